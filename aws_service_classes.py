@@ -1,14 +1,262 @@
-import pdb
 import abc
+import atexit
+import bisect
+import functools
+import itertools
 import json
+import logging
 import os
-import numpy as np
+import random
+import string
+import threading
+import weakref
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError, WaiterError
+from concurrent.futures import ThreadPoolExecutor
 from time import sleep, time
-from sqlalchemy import create_engine, text
 
 from utils import find_optimal_number_of_AZs, handle_exceptions
 
 
+logger = logging.getLogger(__name__)
+
+# settings for S3 uploads/downloads: large files are transferred
+# in several parts using multiple threads
+S3_TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=8*1024*1024,
+    multipart_chunksize=16*1024*1024,
+    max_concurrency=16,
+    use_threads=True
+)
+
+# IAM throttles requests at roughly 10 per second and account,
+# so limit the number of concurrent IAM calls
+MAX_IAM_WORKERS = 10
+_iam_semaphore = threading.BoundedSemaphore(MAX_IAM_WORKERS)
+
+# settings shared by all clients: throttled calls are retried with client-side
+# rate limiting and the connection pool is large enough for concurrent requests
+CLIENT_CONFIG = Config(
+    retries={'mode' : 'adaptive', 'max_attempts' : 10},
+    max_pool_connections=50,
+    tcp_keepalive=True
+)
+
+
+# order in which AWS services are deleted, so that services are deleted before
+# the services they depend on (e.g. IAM roles before their policies); services
+# of the same rank do not depend on each other and can be deleted concurrently
+TEARDOWN_ORDER = {
+    'Lambda function' : 0,
+    'AWS Glue job' : 0,
+    'RDS instance' : 0,
+    'IAM role' : 1,
+    'security group' : 1,
+    'routing table' : 1,
+    'S3 bucket' : 1,
+    'IAM policy' : 2,
+    'internet gateway' : 2,
+    'subnet' : 2,
+    'VPC' : 3,
+}
+
+# boto3 clients already created for each session, keyed by (service, region)
+_clients = weakref.WeakKeyDictionary()
+_clients_lock = threading.Lock()
+
+
+# thread pool shared by all wrapper classes for independent API calls
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """
+    Returns the thread pool shared by all AWS services, creating it on first use.
+    Only submit calls to it that do not use the pool themselves, otherwise
+    waiting for nested tasks can block all worker threads.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=32)
+            atexit.register(_executor.shutdown, wait=True)
+        return _executor
+
+
+def get_client(session, service, region=None):
+    """
+    Returns a boto3 client for the given service and region, creating it only on first use.
+    Clients are thread-safe and can be reused, whereas creating them is slow and not
+    thread-safe, hence the lock.
+    """
+    with _clients_lock:
+        session_clients = _clients.setdefault(session, {})
+        key = (service, region)
+        if key not in session_clients:
+            session_clients[key] = session.client(
+                service, region_name=region, config=CLIENT_CONFIG
+            )
+        return session_clients[key]
+
+
+def warm_up_clients(session, services, region=None):
+    """
+    Creates the clients for the given services in advance (e.g. in a background thread
+    while waiting for user input), so that they are ready when the resources are created.
+    """
+    for service in services:
+        get_client(session, service, region)
+
+
+# SQLAlchemy engines (each with its own connection pool) keyed by database URI
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_engine(db_uri):
+    """
+    Returns a SQLAlchemy engine for the given database URI, creating it only on first use,
+    so that connections are pooled and reused. Stale connections are detected before use.
+    """
+    # SQLAlchemy is slow to import and only needed once the RDS instance is available
+    from sqlalchemy import create_engine
+
+    with _engines_lock:
+        if db_uri not in _engines:
+            _engines[db_uri] = create_engine(
+                db_uri, pool_pre_ping=True, pool_recycle=3600, pool_size=5, max_overflow=5
+            )
+        return _engines[db_uri]
+
+
+@atexit.register
+def _dispose_engines():
+    """
+    Closes the pooled connections of all engines when the program exits.
+    """
+    with _engines_lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
+
+
+@functools.lru_cache(maxsize=64)
+def get_availability_zones(session, region):
+    """
+    Retrieves the availability zones (AZs) of a region. As these rarely change,
+    the result is cached for every session and region.
+    """
+    ec2 = get_client(session, 'ec2', region)
+    response = ec2.describe_availability_zones()
+    return tuple(response['AvailabilityZones'])
+
+
+def wait_with_retry(waiter, retries=1, **kwargs):
+    """
+    Waits using a boto3 waiter, starting to wait again (up to retries times)
+    if the waiter gives up before the resource reaches the desired state.
+    """
+    for attempt in range(retries + 1):
+        try:
+            waiter.wait(**kwargs)
+            return
+        except WaiterError:
+            if attempt == retries:
+                raise
+
+
+def iter_paginated(client, operation, result_key, page_size=1000, **kwargs):
+    """
+    Yields the items (under result_key) of a paginated API operation lazily,
+    page by page, requesting up to page_size items per API call. Several result
+    keys can be given as a tuple, e.g. for operations returning different kinds of items.
+    """
+    result_keys = result_key if isinstance(result_key, tuple) else (result_key,)
+    paginator = client.get_paginator(operation)
+    for page in paginator.paginate(**kwargs, PaginationConfig={'PageSize' : page_size}):
+        for key in result_keys:
+            yield from page.get(key, [])
+
+
+@functools.lru_cache(maxsize=64)
+def get_assume_role_policy_doc(service_name):
+    """
+    Returns the trust policy (JSON string) allowing an AWS service to assume an IAM role.
+    Roles are usually created for a few services only, so the documents are cached.
+    """
+    return json.dumps({
+        "Version" : "2012-10-17",
+        "Statement" : [ # array of statements
+            {    
+                "Action" : "sts:AssumeRole",
+                "Effect" : "Allow",
+                "Principal" : {
+                    "Service": service_name
+                }
+            }
+        ]
+    })
+
+
+@functools.lru_cache(maxsize=128)
+def _read_config_file(path, mtime):
+    """
+    Reads a config file. Cached by path and modification time,
+    so that changes to the file are picked up.
+    """
+    with open(path, 'r') as file:
+        return file.read()
+
+
+def read_config_file(path):
+    """
+    Returns the content of a config file (e.g. JSON policy document) as text.
+    """
+    return _read_config_file(path, os.path.getmtime(path))
+
+
+@functools.lru_cache(maxsize=32)
+def _policy_template(path, mtime):
+    """
+    Creates the template of a policy document from a JSON file.
+    Cached by path and modification time.
+    """
+    return string.Template(_read_config_file(path, mtime))
+
+
+def policy_template(path):
+    """
+    Returns the template of a policy document, with placeholders such as ${REGION}.
+    """
+    return _policy_template(path, os.path.getmtime(path))
+
+
+@functools.lru_cache(maxsize=32)
+def _load_security_group_rules(path, mtime):
+    """
+    Loads the rules of a security group from a JSON file and splits them
+    into inbound and outbound rules. Cached by path and modification time.
+    """
+    rules = json.loads(_read_config_file(path, mtime))
+    permissions = {'inbound' : [], 'outbound' : []}
+    for permission, direction in zip(
+            rules["IpPermissions"], 
+            rules["directions"]
+        ):
+        if direction in permissions:
+            permissions[direction].append(permission)
+    return tuple(permissions['inbound']), tuple(permissions['outbound'])
+
+
+def load_security_group_rules(path):
+    """
+    Returns the inbound and outbound rules of a security group defined in a JSON file.
+    """
+    return _load_security_group_rules(path, os.path.getmtime(path))
+
+
 class AWSService(abc.ABC):
     """
     Abstract wrapper class for creating, deleting, and interacting with AWS services.
@@ -26,40 +274,85 @@ class AWSService(abc.ABC):
         self.az = None
         # AWS region
         self.region = None
+        # a service can be part of several collections (e.g. an RDS instance of several subnets)
+        # which may be deleted concurrently, so make sure it is only deleted once
+        self._delete_lock = threading.Lock()
+        self.deleted = False
+        # set once the service has been created successfully
+        self.created = False
+        # boto3 clients passed in explicitly, keyed by service name
+        self._clients = {}
+
+    def _set_client(self, service, client):
+        """
+        Registers an existing boto3 client to be used for the given service.
+        """
+        if client is not None:
+            self._clients[service] = client
+
+    def _get_client(self, service):
+        """
+        Returns the boto3 client for the given service in the region of this AWS service,
+        i.e. the client passed in on construction or the cached client of the session.
+        """
+        client = self._clients.get(service)
+        if client is None:
+            client = get_client(self.session, service, self.region)
+        return client
 
     @abc.abstractmethod
     def create(self):
         """
         Creates AWS service. To be implemented by respective AWS service wrapper class.
         """
-        string = f"Created {self.type} with name {self.name} and ID {self.id}"
+        msg, args = "Created %s with name %s and ID %s", [self.type, self.name, self.id]
         if self.region:
-            string += f" in region {self.region}"
+            msg += " in region %s"
+            args.append(self.region)
         if self.az:
-            string += f" in Availability Zone {self.az['ZoneName']}"
-        print(string)
-        # ensure that this service is part of its collections' component lists
-        for collection in self.collections:
-            if collection and (not self in collection.components):
-                collection.add_component(self)
+            msg += " in Availability Zone %s"
+            args.append(self.az['ZoneName'])
+        logger.info(msg, *args)
+        self._add_to_collections()
+        self.created = True
         # flag for successful creation
         return 1
 
+    def _add_to_collections(self):
+        """
+        Ensures that this service is part of its collections' component lists.
+        Services that need further steps after the resource exists (e.g. waiting for it)
+        can call this early, so that the resource is deleted with its collections if these steps fail.
+        """
+        for collection in self.collections:
+            if collection is not None and not collection._contains(self):
+                collection.add_component(self)
+
+    def start_deletion(self):
+        """
+        Starts deleting the AWS service without waiting for the deletion to complete.
+        Services whose deletion takes long (e.g. RDS instances) can override this,
+        so that it runs in the background while other services are deleted.
+        """
+        pass
+
     @abc.abstractmethod
     def delete(self):
         """
         Deletes AWS service. To be implemented by respective AWS service wrapper class.
         """
-        string = f"Deleted {self.type} with name {self.name} and ID {self.id}"
+        msg, args = "Deleted %s with name %s and ID %s", [self.type, self.name, self.id]
         if self.region:
-            string += f" in region {self.region}"
+            msg += " in region %s"
+            args.append(self.region)
         if self.az:
-            string += f" in Availability Zone {self.az['ZoneName']}"
-        print(string)
+            msg += " in Availability Zone %s"
+            args.append(self.az['ZoneName'])
+        logger.info(msg, *args)
         # remove this object from its collections
         for collection in self.collections:
-            if collection and (self in collection.components):
-                collection.components.remove(self)
+            if collection is not None:
+                collection._remove_component(self)
         # flag for successful deletion
         return 1
 
@@ -68,19 +361,69 @@ class AWSServiceCollection():
     """
     Class for collection that can contain and easily delete several AWS services.
     """
+    # whether independent components (of the same teardown rank) may be deleted concurrently
+    parallel_deletion = True
+
     def __init__(self):
-        self.components = []
+        # components keyed by their object ID; dicts preserve insertion order
+        # and allow for constant-time membership checks and removal
+        self._components = {}
+        # object IDs of the components with a given name
+        self._names = {}
+        # components of a given class, keyed by their object ID
+        self._types = {}
+        # components may be added from several threads at once (e.g. subnets of a VPC)
+        self._lock = threading.Lock()
+        # set while the components are being deleted
+        self._deleting = False
+
+    @property
+    def components(self):
+        """
+        List of all components in the order in which they were added.
+        """
+        # components may be added concurrently while the list is being created
+        with self._lock:
+            return list(self._components.values())
+
+    def _contains(self, component):
+        """
+        Checks if the component is part of this collection.
+        """
+        return id(component) in self._components
 
     def add_component(self, component : AWSService):
         """
         Adds new component (AWSService instance) to the collection and this collection
         to the list of collections of the respective component (if not already the case).
         """
-        if not component in self.components:
-            self.components.append(component)
-        if not self in component.collections:
-            component.collections.append(self)
+        with self._lock:
+            self._components[id(component)] = component
+            self._names.setdefault(component.name, set()).add(id(component))
+            self._types.setdefault(type(component), {})[id(component)] = component
+            if not self in component.collections:
+                component.collections.append(self)
  
+    def _remove_component(self, component):
+        """
+        Removes component from the collection (if it is part of it).
+        """
+        with self._lock:
+            if self._components.pop(id(component), None) is not None:
+                ids = self._names.get(component.name)
+                if ids is not None:
+                    ids.discard(id(component))
+                    if not ids:
+                        del self._names[component.name]
+                self._types.get(type(component), {}).pop(id(component), None)
+
+    def of_type(self, cls):
+        """
+        List of the components of the given class (e.g. Subnet) in the order in which they were added.
+        """
+        with self._lock:
+            return list(self._types.get(cls, {}).values())
+
     def add_components(self, components):
         """
         Adds several components to the collection.
@@ -88,30 +431,100 @@ class AWSServiceCollection():
         for component in components:
             self.add_component(component)
 
+    def __len__(self):
+        """
+        Number of components in the collection.
+        """
+        return len(self._components)
+
     @property
     def empty(self):
         """
         Checks if collection is empty.
         """
-        # True when list of components is empty
-        return len(self.components) == 0
+        # True when there are no components
+        return len(self._components) == 0
 
-    def delete_components(self):
+    def _iter_services(self):
         """
-        Deletes all AWS compnents and removes them from the components list.
+        Yields all AWS services in this collection and its nested collections (once each).
         """
-        # loop over copy of self.components list, as the original self.components
-        # object will be altered when calling component.delete()
-        for component in self.components.copy():
-            # first check if the component has components on its own, e.g. a VPC
-            # then first delete its components
+        seen = set()
+        stack = list(self._components.values())
+        while stack:
+            component = stack.pop()
+            if id(component) in seen:
+                continue
+            seen.add(id(component))
             if isinstance(component, AWSServiceCollection):
-                component.delete_components()
-            # if the component is a service, delete it and remove it from list
+                stack.extend(component._components.values())
             if isinstance(component, AWSService):
-                deletion_successful = component.delete()
-                if deletion_successful:
-                    self.components.remove(component)
+                yield component
+
+    def delete_components(self):
+        """
+        Deletes all AWS compnents and removes them from the components list.
+        """
+        # start slow deletions (e.g. of RDS instances) of all nested services right away,
+        # so they run in the background while the remaining services are deleted in order
+        services = list(self._iter_services())
+        if services:
+            with ThreadPoolExecutor(max_workers=min(32, len(services))) as executor:
+                list(executor.map(lambda service: service.start_deletion(), services))
+        self._delete_components()
+
+    def _delete_components(self):
+        """
+        Deletes all AWS components of this and nested collections in order.
+        """
+        # guard against deleting a collection again while it is being deleted
+        # (e.g. when it is nested within one of its own components)
+        if self._deleting:
+            return
+        self._deleting = True
+        try:
+            # loop over copies of the components, as the original dictionary
+            # will be altered when calling component.delete()
+            components = list(self._components.values())
+            # first delete the components of nested collections, e.g. the RDS instance
+            # within the subnets of a VPC, which may block deleting their siblings
+            collections = [comp for comp in components if isinstance(comp, AWSServiceCollection)]
+            self._run_deletions(lambda collection: collection._delete_components(), collections)
+            # delete the services in the order of their dependencies and remove them from
+            # the collection (sorting is stable, so services of the same rank are deleted in the
+            # order in which they were added); services of the same rank are independent of each
+            # other (e.g. subnets, or Lambda functions and the RDS instance), so when deleting
+            # in parallel, each rank is deleted concurrently once the previous rank is done
+            services = [comp for comp in components if isinstance(comp, AWSService)]
+            rank = lambda service: TEARDOWN_ORDER.get(service.type, len(TEARDOWN_ORDER))
+            services.sort(key=rank)
+            for _, group in itertools.groupby(services, key=rank):
+                self._run_deletions(self._delete_service, list(group))
+        finally:
+            self._deleting = False
+
+    def _run_deletions(self, func, components):
+        """
+        Applies a deletion function to the components, concurrently if parallel deletion
+        is enabled. Uses a separate thread pool, since deletions can be nested.
+        """
+        if self.parallel_deletion and len(components) > 1:
+            with ThreadPoolExecutor(max_workers=min(16, len(components))) as executor:
+                list(executor.map(func, components))
+        else:
+            for component in components:
+                func(component)
+
+    def _delete_service(self, service):
+        """
+        Deletes a service (unless it has already been deleted through another collection)
+        and removes it from the collection.
+        """
+        with service._delete_lock:
+            if not service.deleted:
+                service.deleted = bool(service.delete())
+        if service.deleted:
+            self._remove_component(service)
     
     def delete_components_with_retry(self, max_attempts=3):
         """
@@ -123,16 +536,19 @@ class AWSServiceCollection():
         # loop in case any deletion fails on first attempt
         while not self.empty:
             if c > max_attempts:
-                print("Could not delete all AWS resources!")
-                print("Please delete the following components manually:")
+                logger.error("Could not delete all AWS resources!")
+                logger.error("Please delete the following components manually:")
                 self.list()
                 return
             c += 1
             if not first_deletion_attempt:
-                print('\nTrying again to delete remaining components...')
+                # only the components that could not be deleted remain in the collection;
+                # give AWS some time to propagate the deletions they depend on
+                sleep(random.uniform(0, 2**c))
+                logger.info('\nTrying again to delete %d remaining component(s)...', len(self))
             self.delete_components()
             first_deletion_attempt = False
-        print("\nAll components deleted successfully!")
+        logger.info("\nAll components deleted successfully!")
     
     def contains_resource(self, name=None, id=None):
         """
@@ -140,11 +556,11 @@ class AWSServiceCollection():
         """
         if not name and not id:
             raise Exception("You must specify either ID or name of the resource!")
-        for comp in self.components:
-            if name and name == comp.name:
-                return True
-            if id and id == comp.id:
-                return True
+        # resources are indexed by name; IDs are only known after creation
+        if name and self._names.get(name):
+            return True
+        if id:
+            return any(id == comp.id for comp in self.components)
         return False
 
     def list(self):
@@ -152,14 +568,16 @@ class AWSServiceCollection():
         Lists all components.
         """
         for comp in self.components:
-            string = f"{comp.type} with name {comp.name} and ID {comp.id}"
+            msg, args = "%s with name %s and ID %s", [comp.type, comp.name, comp.id]
             if comp.region:
-                string += f" in region {comp.region}"
+                msg += " in region %s"
+                args.append(comp.region)
             if comp.az:
-                string += f" in Availability Zone {comp.az['ZoneName']}"
+                msg += " in Availability Zone %s"
+                args.append(comp.az['ZoneName'])
             if isinstance(comp, AWSServiceCollection):
                 comp.list()
-            print(string)
+            logger.info(msg, *args)
 
 
 class Subnet(AWSServiceCollection, AWSService):
@@ -168,7 +586,7 @@ class Subnet(AWSServiceCollection, AWSService):
     and is an AWS service itself.
     """
     def __init__(self, session, region, vpc_id, subnet_cidr, az, subnet_name=None,
-                 collections=None):
+                 collections=None, ec2_client=None):
         AWSServiceCollection.__init__(self)
         AWSService.__init__(self, session, collections, type='subnet')
         self.region = region
@@ -176,6 +594,9 @@ class Subnet(AWSServiceCollection, AWSService):
         self.az = az
         self.vpc_id = vpc_id
         self.cidr = subnet_cidr
+        # an existing EC2 client can be passed, e.g. when creating several
+        # subnets from different threads (creating clients is not thread-safe)
+        self._set_client('ec2', ec2_client)
         self.create()
 
     @handle_exceptions('subnet', 'create')
@@ -183,7 +604,7 @@ class Subnet(AWSServiceCollection, AWSService):
         """
         Create subnet.
         """
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         response = ec2.create_subnet(
             VpcId=self.vpc_id,
             AvailabilityZone=self.az['ZoneName'], 
@@ -192,7 +613,7 @@ class Subnet(AWSServiceCollection, AWSService):
         self.vpc_id = self.vpc_id
         self.cidr = self.cidr
         self.id = response['Subnet']['SubnetId']
-        super().create()
+        return super().create()
 
     @handle_exceptions('subnet', 'delete')
     def delete(self):
@@ -201,9 +622,9 @@ class Subnet(AWSServiceCollection, AWSService):
         """
         # delete all instances within subnet before deleting subnet itself
         self.delete_components()
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         ec2.delete_subnet(SubnetId=self.id)
-        super().delete()
+        return super().delete()
 
 
 class VPC(AWSServiceCollection, AWSService):
@@ -212,9 +633,10 @@ class VPC(AWSServiceCollection, AWSService):
     and is an AWS service itself.
     """
     def __init__(self, session, region, num_subnets, vpc_name=None, 
-                 collections=None):
+                 collections=None, ec2_client=None):
         AWSServiceCollection.__init__(self)
         AWSService.__init__(self, session, collections, type='VPC')
+        self._set_client('ec2', ec2_client)
         self.name = vpc_name
         self.region = region
         self.num_subnets = num_subnets
@@ -228,7 +650,7 @@ class VPC(AWSServiceCollection, AWSService):
         """
         assert self.num_subnets <= 256 # chosen CIDR notation allows for 256 subnets
 
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         # create VPC with specified IP addresses
         cidr_block = '10.0.0.0/16'
         response = ec2.create_vpc(CidrBlock=cidr_block)
@@ -248,33 +670,39 @@ class VPC(AWSServiceCollection, AWSService):
             },
             VpcId=self.id,
         )
-        super().create()
+        created = super().create()
 
         # CREATE SUBNETS
         # retrieve available availability zones (AZs)
-        az_response = ec2.describe_availability_zones()
-        azs = az_response['AvailabilityZones']
+        azs = get_availability_zones(self.session, self.region)
 
         # given the number of subnets to be created and the number 
         # of AZs available, determine the best number of AZs to use
         # in order to ensure high availability (with at least two subnets per AZ)
         n_azs = find_optimal_number_of_AZs(self.num_subnets, len(azs))
         self.num_azs_used = n_azs
-        max_n_subnets_per_az = np.ceil(self.num_subnets / n_azs)
-        
-        for i in range(self.num_subnets):
-            # fill up each AZ with subnets until limit is reached
-            # as calculated above
-            az_idx = int(i // max_n_subnets_per_az)
-            az = azs[az_idx]
-            # specify CIDR block for subnet
-            # note: this notation allows for up to 256 subnets
-            subnet_cidr = f'10.0.{i+1}.0/24'
-            # create subnet; automatically gets added to VPC's components list
-            # when setting collections=[self]
-            subnet = Subnet(self.session, self.region, vpc_id, subnet_cidr,
-                            az, collections=[self])
-        
+
+        if self.num_subnets == 0:
+            return created
+        # distribute subnets evenly across the AZs (e.g. 10 subnets on 3 AZs as 3, 3, 4):
+        # AZ a receives the subnets with indices from bounds[a] up to bounds[a+1]
+        bounds = [(self.num_subnets * a) // n_azs for a in range(n_azs + 1)]
+        # note: this CIDR notation allows for up to 256 subnets
+        subnet_cidrs = [f'10.0.{i+1}.0/24' for i in range(self.num_subnets)]
+        subnet_azs = [azs[bisect.bisect_right(bounds, i) - 1] for i in range(self.num_subnets)]
+
+        # create subnets concurrently, as each creation is a separate API call;
+        # subnets automatically get added to VPC's components list
+        # when setting collections=[self]
+        session, region = self.session, self.region
+
+        def create_subnet(subnet_cidr, az):
+            return Subnet(session, region, vpc_id, subnet_cidr, az,
+                          collections=[self], ec2_client=ec2)
+
+        list(get_executor().map(create_subnet, subnet_cidrs, subnet_azs))
+        return created
+
     @handle_exceptions('vpc', 'delete')
     def delete(self):
         """
@@ -282,9 +710,9 @@ class VPC(AWSServiceCollection, AWSService):
         """
         # delete all instances within VPC before deleting VPC itself
         self.delete_components()
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         ec2.delete_vpc(VpcId=self.id)
-        super().delete()
+        return super().delete()
 
 
 class IAMPolicy(AWSService):
@@ -310,32 +738,32 @@ class IAMPolicy(AWSService):
         """
         Create an IAM policy from a policy document in JSON format.
         """
-        iam = self.session.client('iam')
+        iam = self._get_client('iam')
 
-        with open(json_file, 'r') as file:
-            policy_doc = json.dumps(json.load(file))
+        template = policy_template(json_file)
 
         # enter correct region and account ID into the policy document
-        if 'REGION' in policy_doc:
-            policy_doc = policy_doc.replace('REGION', region)
-        if 'ACCOUNT_ID' in policy_doc:
-            policy_doc = policy_doc.replace('ACCOUNT_ID', account_id)
+        # (placeholders ${REGION} and ${ACCOUNT_ID}) in a single pass
+        values = {'REGION' : region, 'ACCOUNT_ID' : account_id}
+        policy_doc = template.safe_substitute(
+            {key : value for key, value in values.items() if value is not None}
+        )
 
         response = iam.create_policy(
             PolicyName=self.name,
             PolicyDocument=policy_doc
         )
         self.id = response['Policy']['Arn']
-        super().create()
+        return super().create()
 
     @handle_exceptions('IAM policy', 'delete')
     def delete(self):
         """
         Deletes IAM policy.
         """
-        iam = self.session.client('iam')
+        iam = self._get_client('iam')
         iam.delete_policy(PolicyArn=self.id)
-        super().delete()
+        return super().delete()
 
 
 class IAMRole(AWSService):
@@ -355,59 +783,72 @@ class IAMRole(AWSService):
         """
         Creates an IAM role for a specified service that allows specified actions.
         """
-        iam = self.session.client('iam')
+        iam = self._get_client('iam')
 
-        assume_role_policy_doc = {
-            "Version" : "2012-10-17",
-            "Statement" : [ # array of statements
-                {    
-                    "Action" : "sts:AssumeRole",
-                    "Effect" : "Allow",
-                    "Principal" : {
-                        "Service": self.aws_service
-                    }
-                }
-            ]
-        }
+        assume_role_policy_doc = get_assume_role_policy_doc(self.aws_service)
         # make API call to IAM service to create IAM role
         response = iam.create_role(
             RoleName = self.name,
-            AssumeRolePolicyDocument = json.dumps(assume_role_policy_doc)
+            AssumeRolePolicyDocument = assume_role_policy_doc
         )
-        # attach policies to the role
-        for policy in self.policies:
-            arn = policy.id
+        # get Amazon resource name (ARN) from the server's response
+        self.id = response['Role']['Arn']
+        # the role exists from now on, so make sure it is deleted with its collections
+        # even if attaching the policies or waiting for the role fails
+        self._add_to_collections()
+        # attach policies to the role (the calls are independent and can run concurrently)
+        def attach_policy(policy):
             iam.attach_role_policy(
                 RoleName = self.name, 
-                PolicyArn = arn
+                PolicyArn = policy.id
             )
-        # get Amazon resource name (ARN) from the server's response
-        self.id = response['Role']['Arn']
-        super().create()
+        self._for_each_policy(attach_policy)
+        # make sure the role is visible before services (e.g. Lambda functions) try to assume it
+        waiter = iam.get_waiter('role_exists')
+        waiter.wait(RoleName=self.name, WaiterConfig={'Delay' : 1, 'MaxAttempts' : 10})
+        return super().create()
 
     @handle_exceptions('IAM role', 'delete')
     def delete(self):
         """
         Detaches policies from IAM role and then deletes role.
         """
-        iam = self.session.client('iam')
+        iam = self._get_client('iam')
         # detach policies before deleting the IAM role
-        for policy in self.policies:
-            arn = policy.id
-            iam.detach_role_policy(
-                RoleName=self.name,
-                PolicyArn=arn
-            )
+        def detach_policy(policy):
+            try:
+                iam.detach_role_policy(
+                    RoleName=self.name,
+                    PolicyArn=policy.id
+                )
+            except ClientError as e:
+                # the policy may not have been attached (if creating the role failed)
+                if e.response['Error']['Code'] != 'NoSuchEntity':
+                    raise
+        self._for_each_policy(detach_policy)
         iam.delete_role(RoleName=self.name)
-        super().delete()
+        return super().delete()
+
+    def _for_each_policy(self, func):
+        """
+        Applies func to all policies of the role concurrently, limiting the number of
+        simultaneous IAM calls.
+        """
+        def call_iam(policy):
+            with _iam_semaphore:
+                return func(policy)
+        # consume the results to re-raise any exception
+        list(get_executor().map(call_iam, self.policies))
 
 
 class SecurityGroup(AWSService):
     """
     Wrapper class for security groups.
     """
-    def __init__(self, session, region, vpc_id, name, description, json_file=None, collections=None):
+    def __init__(self, session, region, vpc_id, name, description, json_file=None, collections=None,
+                 ec2_client=None):
         super().__init__(session, collections, type='security group')
+        self._set_client('ec2', ec2_client)
         self.name = name
         self.region = region
         self.vpc_id = vpc_id
@@ -419,7 +860,7 @@ class SecurityGroup(AWSService):
         """
         Creates security group within specified VPC and with specified rules.
         """
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         
         response = ec2.create_security_group(
             GroupName=self.name,
@@ -430,43 +871,45 @@ class SecurityGroup(AWSService):
         self.id = security_group_id
 
         if json_file is not None:
-            # load IP permission for security group from JSON file
-            with open(json_file, 'r') as file:
-                rules = json.load(file)
-
-            # attach inbound and outbound rules to the security group
-            for permission, direction in zip(
-                    rules["IpPermissions"], 
-                    rules["directions"]
-                ):
-                if direction == 'inbound':
-                    ec2.authorize_security_group_ingress(
-                        GroupId=security_group_id,
-                        IpPermissions=[permission]
-                    )
-                elif direction == 'outbound': 
-                    ec2.authorize_security_group_egress(
-                        GroupId=security_group_id,
-                        IpPermissions=[permission]
-                    )
-        super().create()
+            # load IP permission for security group from JSON file, split by direction,
+            # so that all rules of a direction can be attached in a single API call
+            ingress, egress = load_security_group_rules(json_file)
+
+            # attach inbound and outbound rules to the security group;
+            # the two calls are independent, so the outbound rules are attached concurrently
+            egress_future = None
+            if egress:
+                egress_future = get_executor().submit(
+                    ec2.authorize_security_group_egress,
+                    GroupId=security_group_id,
+                    IpPermissions=list(egress)
+                )
+            if ingress:
+                ec2.authorize_security_group_ingress(
+                    GroupId=security_group_id,
+                    IpPermissions=list(ingress)
+                )
+            if egress_future:
+                egress_future.result()
+        return super().create()
             
     @handle_exceptions('security group', 'delete')
     def delete(self):
         """
         Delete security group.
         """
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         ec2.delete_security_group(GroupId=self.id)
-        super().delete()
+        return super().delete()
     
 
 class S3Bucket(AWSService):
     """
     Wrapper class for AWS simple storage service (S3 Bucket).
     """
-    def __init__(self, session, region, name, collections=None):
+    def __init__(self, session, region, name, collections=None, s3_client=None):
         super().__init__(session, collections, type='S3 bucket')
+        self._set_client('s3', s3_client)
         self.region = region
         # bucket name is globally unique identifier for the bucket
         self.name = name
@@ -477,24 +920,55 @@ class S3Bucket(AWSService):
         """
         Creates S3 bucket in specified region.
         """
-        s3 = self.session.client('s3', region_name=self.region)
+        s3 = self._get_client('s3')
         response = s3.create_bucket(
             Bucket=self.name,
             CreateBucketConfiguration={
                 'LocationConstraint' : self.region
             }
         )
-        super().create()
+        return super().create()
 
     @handle_exceptions('S3 bucket', 'delete data from')
     def delete_all_objects(self):
         """
-        Deletes all objects stored in the bucket.
+        Deletes all objects stored in the bucket, including all object versions
+        and delete markers if versioning is (or was) enabled for the bucket.
+        Returns True if all objects were deleted.
         """
-        s3 = self.session.resource('s3')
-        bucket = s3.Bucket(self.name)
-        for object in bucket.objects.all():
-            object.delete()
+        s3 = self._get_client('s3')
+
+        def delete_objects(objects):
+            response = s3.delete_objects(
+                Bucket=self.name,
+                Delete={
+                    'Objects' : objects,
+                    'Quiet' : True
+                }
+            )
+            # in quiet mode, the response only lists the objects that could not be deleted
+            errors = response.get('Errors', [])
+            if errors:
+                failed = ', '.join(f"{error['Key']} ({error['Code']})" for error in errors[:10])
+                raise Exception(f"Error! Could not delete {len(errors)} objects: {failed}")
+
+        # delete the objects in batches concurrently while listing the remaining objects;
+        # a single request can delete up to 1000 objects. Listing the object versions
+        # also covers unversioned buckets, where each object has the version 'null'
+        futures = []
+        objects = []
+        for obj in iter_paginated(s3, 'list_object_versions', ('Versions', 'DeleteMarkers'),
+                                  Bucket=self.name):
+            objects.append({'Key' : obj['Key'], 'VersionId' : obj['VersionId']})
+            if len(objects) == 1000:
+                futures.append(get_executor().submit(delete_objects, objects))
+                objects = []
+        if objects:
+            futures.append(get_executor().submit(delete_objects, objects))
+        # wait for all deletions, re-raising any exception
+        for future in futures:
+            future.result()
+        return True
 
     @handle_exceptions('S3 bucket', 'delete')
     def delete(self):
@@ -502,31 +976,44 @@ class S3Bucket(AWSService):
         Empties and deletes S3 bucket.
         """
         # before deleting the bucket, all of its objects need to be deleted
-        self.delete_all_objects()
-        s3 = self.session.client('s3', region_name=self.region)
+        if not self.delete_all_objects():
+            raise Exception(f"Error! S3 bucket {self.name} could not be emptied!")
+        s3 = self._get_client('s3')
         s3.delete_bucket(Bucket=self.name)
-        super().delete()
+        return super().delete()
 
     @handle_exceptions('S3 bucket', 'upload data to')
-    def upload_data(self, file_path, object_key):
+    def upload_data(self, file_path, object_key, transfer_config=None):
         """
-        Uploads a local file to the bucket.
+        Uploads a local file to the bucket. Large files are uploaded in parts concurrently,
+        as specified by the transfer configuration (S3_TRANSFER_CONFIG by default).
         """
         if not os.path.exists(file_path):
             raise ValueError(f"File {file_path} does not exist.")
 
-        s3 = self.session.client('s3', region_name=self.region)
-        with open(file_path, 'rb') as file:
-            s3.put_object(Bucket=self.name, Key=object_key, Body=file)
+        s3 = self._get_client('s3')
+        s3.upload_file(file_path, self.name, object_key, Config=transfer_config or S3_TRANSFER_CONFIG)
+        # flag for successful upload
+        return 1
+
+    @handle_exceptions('S3 bucket', 'upload data to')
+    def upload_fileobj(self, fileobj, object_key, transfer_config=None):
+        """
+        Uploads the data read from a file-like object (e.g. a stream) to the bucket.
+        The data is uploaded in parts while it is being read, without storing it locally.
+        """
+        s3 = self._get_client('s3')
+        s3.upload_fileobj(fileobj, self.name, object_key, Config=transfer_config or S3_TRANSFER_CONFIG)
+        # flag for successful upload
+        return 1
 
     @handle_exceptions('S3 bucket', 'load data from')
     def get_data(self, object_key, destination_path):
         """
         Retrieves data from the bucket and save it to a local file.
         """
-        s3 = self.session.client('s3', region_name=self.region)
-        with open(destination_path, 'wb') as file:
-            s3.download_fileobj(self.name, object_key, file)
+        s3 = self._get_client('s3')
+        s3.download_file(self.name, object_key, destination_path, Config=S3_TRANSFER_CONFIG)
 
 
 class RDSInstance(AWSService):
@@ -538,9 +1025,8 @@ class RDSInstance(AWSService):
         super().__init__(session, collections, type='RDS instance')
         self.name = name
         self.region = region
-        # load master username and password from JSON file
-        with open(credentials_file, 'r') as f:
-            configs = json.load(f)
+        # load master username and password from JSON file (its content is cached)
+        configs = json.loads(read_config_file(credentials_file))
         # username and password specified in the credentials file
         self.username = configs['DB_username']
         self.password = configs['DB_password']
@@ -550,13 +1036,15 @@ class RDSInstance(AWSService):
         self.create()
         # need to explicitly retrieve host name later, after RDS instance has booted up
         self.hostname = None
+        # set once the deletion of the RDS instance has been requested
+        self.deletion_started = False
 
     @handle_exceptions('RDS instance', 'create')
     def create(self):
         """
         Creates RDS instance and attach security groups and IAM roles (if specified).
         """
-        rds = self.session.client('rds', region_name=self.region)
+        rds = self._get_client('rds')
         security_group_ids = [sg.id for sg in self.security_groups]
         subnet_ids = [sn.id for sn in self.subnets]
 
@@ -585,34 +1073,43 @@ class RDSInstance(AWSService):
             PubliclyAccessible=True,
         )
         self.id = response['DBInstance']['DBInstanceArn']
-        super().create()
+        return super().create()
 
     @handle_exceptions('RDS instance', 'retrieve the host name')
-    def retrieve_hostname(self):
+    def retrieve_hostname(self, stop_event=None):
         """
         Waits for instance to become availble and then retrieve the assigned host name.
+        Stops waiting early if the (optional) stop event is set, e.g. when the setup is aborted.
         """
-        rds = self.session.client('rds', region_name=self.region)
+        rds = self._get_client('rds')
         # Wait until the RDS instance is available
-        print("Waiting until the RDS instance is available (this may take several minutes)...")
-        waiter = rds.get_waiter('db_instance_available')
-        # wait for 30 minutes max.
+        logger.info("Waiting until the RDS instance is available (this may take several minutes)...")
+        # wait for 30 minutes max., polling with exponential backoff (5 s up to 30 s)
+        # and full jitter to avoid bursts of requests from concurrent setups
         tic = time()
-        waiter.wait(
-            DBInstanceIdentifier=self.name,
-            WaiterConfig={
-                'Delay': 30,
-                'MaxAttempts': 60
-            }
-        )
-        # Once available, retrieve the instance information
-        response = rds.describe_db_instances(DBInstanceIdentifier=self.name)
+        attempts = 0
+        while True:
+            response = rds.describe_db_instances(DBInstanceIdentifier=self.name)
+            status = response['DBInstances'][0]['DBInstanceStatus']
+            if status == 'available':
+                break
+            if status in ('failed', 'deleting', 'incompatible-parameters', 'storage-full'):
+                raise Exception(f"Error! RDS instance has status {status}!")
+            if time() - tic > 30*60:
+                raise Exception("Error! Timed out waiting for RDS instance to become available!")
+            delay = random.uniform(0, min(30, 5 * 2**min(attempts, 3)))
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    raise Exception("Stopped waiting for RDS instance to become available!")
+            else:
+                sleep(delay)
+            attempts += 1
         toc = time()
         diff = toc-tic
         mins = int(diff // 60)
         secs = diff % 60
-        print(f"Completed after {mins} minutes and {secs:.2f} seconds")
-        # Store the endpoint (hostname) as an attribute
+        logger.info("Completed after %s minutes and %.2f seconds", mins, secs)
+        # Store the endpoint (hostname) of the available instance as an attribute
         self.hostname = response['DBInstances'][0]['Endpoint']['Address']
 
     #@handle_exceptions('RDS instance', 'create database on')
@@ -626,13 +1123,13 @@ class RDSInstance(AWSService):
         # uri for connecting to default database (postgres) in order to create a new database
         db_uri = f'postgresql://{self.username}:{self.password}@{self.hostname}:{port}/postgres'
     
-        # create SQLAlchemy engine and create new database
-        engine = create_engine(db_uri)
+        # get (cached) SQLAlchemy engine and create new database
+        engine = get_engine(db_uri)
 
-        with engine.connect() as connection:
-            connection.execute(text("commit"))
-            connection.execute(text(f"CREATE DATABASE {dbname};"))
-        print(f"Created new database {dbname}")
+        # CREATE DATABASE cannot run inside a transaction block
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql(f"CREATE DATABASE {dbname};")
+        logger.info("Created new database %s", dbname)
         
     @handle_exceptions('RDS instance', 'install extension for')
     def install_extension(self, ext_name, dbname, port='5432'):
@@ -645,31 +1142,49 @@ class RDSInstance(AWSService):
         # uri for connecting to specified database in order to create a new database
         db_uri = f'postgresql://{self.username}:{self.password}@{self.hostname}:{port}/{dbname}'
     
-        # create SQLAlchemy engine and create new database
-        engine = create_engine(db_uri)
+        # get (cached) SQLAlchemy engine and create new database
+        engine = get_engine(db_uri)
 
-        with engine.connect() as connection:
-            connection.execute(text("commit"))
-            connection.execute(text(f"CREATE EXTENSION IF NOT EXISTS {ext_name} CASCADE;"))
-        print(f'Installed {ext_name} extension for RDS instance with name {self.name}')
+        with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+            connection.exec_driver_sql(f"CREATE EXTENSION IF NOT EXISTS {ext_name} CASCADE;")
+        logger.info('Installed %s extension for RDS instance with name %s', ext_name, self.name)
 
-    @handle_exceptions('RDS instance', 'delete')
-    def delete(self):
+    @handle_exceptions('RDS instance', 'start deletion of')
+    def start_deletion(self):
         """
-        Deletes RDS instance and the associated subnet group (without backups).
+        Requests deletion of the RDS instance (without backups) and returns immediately.
         """
-        rds = self.session.client('rds', region_name=self.region)
-        # delete RDS instance
+        if self.deletion_started:
+            return
+        rds = self._get_client('rds')
         rds.delete_db_instance(
             DBInstanceIdentifier=self.name,
             SkipFinalSnapshot=True
         )
+        self.deletion_started = True
+
+    @handle_exceptions('RDS instance', 'delete')
+    def delete(self):
+        """
+        Deletes RDS instance and the associated subnet group (without backups).
+        """
+        rds = self._get_client('rds')
+        # delete RDS instance, unless this has already been requested
+        self.start_deletion()
         # create Waiter object to make sure RDS instance is deleted
         # before proceeding
-        print("Waiting for deletion of RDS instance (this may take several minutes)...")
+        logger.info("Waiting for deletion of RDS instance (this may take several minutes)...")
         waiter = rds.get_waiter('db_instance_deleted')
         tic = time()
-        waiter.wait(DBInstanceIdentifier=self.name)
+        # wait for 20 minutes, then once more if the instance is still not deleted
+        wait_with_retry(
+            waiter,
+            DBInstanceIdentifier=self.name,
+            WaiterConfig={
+                'Delay': 15,
+                'MaxAttempts': 80
+            }
+        )
         # after RDS instance is deleted, can remove subnet group
         rds.delete_db_subnet_group(
             DBSubnetGroupName=self.db_subnet_group_name,
@@ -678,8 +1193,8 @@ class RDSInstance(AWSService):
         diff = toc-tic
         mins = int(diff // 60)
         secs = diff % 60
-        print(f"Completed after {mins} minutes and {secs:.2f} seconds")
-        super().delete()
+        logger.info("Completed after %s minutes and %.2f seconds", mins, secs)
+        return super().delete()
         
 
 class AWSGlueJob(AWSService):
@@ -701,7 +1216,7 @@ class AWSGlueJob(AWSService):
         """
         Creates Glue ETL job. 
         """ 
-        glue_client = self.session.client('glue', region_name=self.region)
+        glue_client = self._get_client('glue')
 
         # variables/arguments for the job
         job_args = {}
@@ -727,16 +1242,16 @@ class AWSGlueJob(AWSService):
             NumberOfWorkers=2,
             WorkerType='Standard'#|'G.1X'|'G.2X'|'G.025X'
         )
-        super().create()
+        return super().create()
 
     @handle_exceptions('AWS Glue job', 'delete')
     def delete(self):
         """
         Deletes Glue ETL job.
         """
-        glue_client = self.session.client('glue', region_name=self.region)
+        glue_client = self._get_client('glue')
         glue_client.delete_job(JobName=self.name)
-        super().delete()
+        return super().delete()
         
 
 class S3LambdaFunction(AWSService):
@@ -760,7 +1275,7 @@ class S3LambdaFunction(AWSService):
         """
         Creates AWS Lambda function (x86_64 architecture) with specified deployment package.
         """
-        lambda_client = self.session.client('lambda', region_name=self.region)
+        lambda_client = self._get_client('lambda')
 
         environment_variables = {}
         # variable names for the Lambda function to use
@@ -786,8 +1301,15 @@ class S3LambdaFunction(AWSService):
         self.id = response['FunctionArn']
 
         # wait util the Lambda function is set up before proceeding
-        waiter = lambda_client.get_waiter('function_active')
-        waiter.wait(FunctionName=self.name)
+        waiter = lambda_client.get_waiter('function_active_v2')
+        wait_with_retry(
+            waiter,
+            FunctionName=self.name,
+            WaiterConfig={
+                'Delay': 1,
+                'MaxAttempts': 30
+            }
+        )
 
         # add permission that allows the S3 bucket to invoke the Lambda function
         source_bucket_arn = f"arn:aws:s3:::{self.bucket_name_trigger}"
@@ -800,7 +1322,7 @@ class S3LambdaFunction(AWSService):
             SourceAccount=account_id
         )
 
-        s3_client = self.session.client('s3')
+        s3_client = self._get_client('s3')
 
         response = s3_client.put_bucket_notification_configuration(
             Bucket=self.bucket_name_trigger,
@@ -813,24 +1335,25 @@ class S3LambdaFunction(AWSService):
                 ]
             }
         )
-        super().create()
+        return super().create()
 
     @handle_exceptions('Lambda function', 'delete')  
     def delete(self):
         """
         Deletes Lambda function.
         """
-        lambda_client = self.session.client('lambda', region_name=self.region)
+        lambda_client = self._get_client('lambda')
         lambda_client.delete_function(FunctionName=self.name)
-        super().delete()
+        return super().delete()
 
 
 class InternetGateway(AWSService):
     """
     Wrapper class for managing internet gateways in AWS.
     """
-    def __init__(self, session, region, vpc_id, collections=None):
+    def __init__(self, session, region, vpc_id, collections=None, ec2_client=None):
         super().__init__(session, collections, type='internet gateway')
+        self._set_client('ec2', ec2_client)
         self.region = region
         self.vpc_id = vpc_id
         self.id = None
@@ -841,33 +1364,38 @@ class InternetGateway(AWSService):
         """
         Creates internet gateway and attaches it to VPC.
         """
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         response = ec2.create_internet_gateway()
         self.id = response['InternetGateway']['InternetGatewayId']
         # atach to VPC
         ec2.attach_internet_gateway(InternetGatewayId=self.id, VpcId=self.vpc_id)
-        super().create()
+        return super().create()
 
     @handle_exceptions('internet gateway', 'delete')
     def delete(self):
         """
         Detaches and deletes internet gateway.
         """
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         ec2.detach_internet_gateway(InternetGatewayId=self.id, VpcId=self.vpc_id)
         ec2.delete_internet_gateway(InternetGatewayId=self.id)
-        super().delete()
+        return super().delete()
         
 
 class RoutingTable(AWSService):
     """
     Wrapper class for creating and managing routing tables in AWS.
     """
-    def __init__(self, session, region, vpc_id, subnets=None, collections=None):
+    def __init__(self, session, region, vpc_id, subnets=None, collections=None, ec2_client=None):
         super().__init__(session, collections, type='routing table')
+        self._set_client('ec2', ec2_client)
         self.region = region
         self.vpc_id = vpc_id
         self.id = None
+        # IDs of the subnet associations and destinations of the routes added to the table,
+        # so that they can be removed without looking them up again
+        self.associations = []
+        self.routes = []
         self.create(subnets)
 
     @handle_exceptions('routing table', 'create')
@@ -875,7 +1403,7 @@ class RoutingTable(AWSService):
         """
         Creates routing table in VPC and associate it with the specified subnets.
         """
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         response = ec2.create_route_table(VpcId=self.vpc_id)
         self.id = response['RouteTable']['RouteTableId']
 
@@ -883,42 +1411,59 @@ class RoutingTable(AWSService):
         # (otherwise, they will be associated with the main/default route table)
         if subnets:
             for subnet in subnets:
-                ec2.associate_route_table(
-                SubnetId=subnet.id, 
-                RouteTableId=self.id
-            )
-        super().create()
+                response = ec2.associate_route_table(
+                    SubnetId=subnet.id, 
+                    RouteTableId=self.id
+                )
+                self.associations.append(response['AssociationId'])
+        return super().create()
 
     @handle_exceptions('routing table', 'add route to')
     def add_route(self, gateway_id, destination_cidr):
         """
         Adds route for internet gateway.
         """
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = self._get_client('ec2')
         ec2.create_route(
             RouteTableId=self.id,
             DestinationCidrBlock=destination_cidr,
             GatewayId=gateway_id
         )
+        self.routes.append(destination_cidr)
 
     @handle_exceptions('routing table', 'delete')
     def delete(self):
         """
         Removes all routes and associations and deletes routing table from VPC.
         """
-        ec2 = self.session.client('ec2', region_name=self.region)
-        response = ec2.describe_route_tables(RouteTableIds=[self.id])
-        route_table = response['RouteTables'][0]
-
-        # remove associations
-        for assoc in route_table['Associations']:
-            if not assoc['Main']:
-                ec2.disassociate_route_table(AssociationId=assoc['RouteTableAssociationId'])
-
-        # remove non-default routes
-        for route in route_table['Routes']:
-            if not route['Origin'] == 'CreateRouteTable':
-                ec2.delete_route(RouteTableId=self.id, DestinationCidrBlock=route['DestinationCidrBlock'])
+        ec2 = self._get_client('ec2')
+        associations, routes = self.associations, self.routes
+        # only look up associations and routes if none have been recorded
+        if not associations and not routes:
+            response = ec2.describe_route_tables(RouteTableIds=[self.id])
+            route_table = response['RouteTables'][0]
+            associations = [assoc['RouteTableAssociationId'] for assoc in route_table['Associations']
+                            if not assoc['Main']]
+            routes = [route['DestinationCidrBlock'] for route in route_table['Routes']
+                      if not route['Origin'] == 'CreateRouteTable']
+
+        # remove associations and non-default routes concurrently
+        futures = [
+            get_executor().submit(ec2.disassociate_route_table, AssociationId=association_id)
+            for association_id in associations
+        ]
+        futures += [
+            get_executor().submit(ec2.delete_route, RouteTableId=self.id,
+                                  DestinationCidrBlock=destination_cidr)
+            for destination_cidr in routes
+        ]
+        # wait until all associations and routes are removed, re-raising any exception;
+        # a repeated deletion attempt will look up what is left instead
+        try:
+            for future in futures:
+                future.result()
+        finally:
+            self.associations, self.routes = [], []
 
         ec2.delete_route_table(RouteTableId=self.id)
-        super().delete()
\ No newline at end of file
+        return super().delete()
\ No newline at end of file
@@ -1,4 +1,20 @@
+import functools
+import shutil
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+@functools.lru_cache(maxsize=None)
+def get_http_session():
+    """
+    Returns a shared HTTP session, so that repeated downloads reuse the connection
+    to the server. Requests failing with temporary server errors are retried.
+    """
+    session = requests.Session()
+    retries = Retry(total=3, backoff_factor=1.0, status_forcelist=[502, 503, 504], raise_on_status=False)
+    session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=4, max_retries=retries))
+    return session
 
 
 class DataDownloader():
@@ -13,24 +29,38 @@ class DataDownloader():
         # URL last confirmed on 30/05/2023
         self.url = 'https://sdi.eea.europa.eu/datashare/s/GYJfBm2fMr5P6Be/download?path=&files=GHG_projections_2022_EEA_csv.csv'
         self.data_name = 'eu_ghg_projections'
+        self.session = get_http_session()
+
+    def stream_emission_data(self, consumer):
+        """
+        Streams dataset on greenhouse emissions from EEA website to a consumer, i.e. a function
+        reading from a file-like object (e.g. writing to a file or uploading to S3), so that the data
+        does not need to be held in memory. Returns the result of the consumer, or None if the request fails.
+        """
+        with self.session.get(self.url, stream=True, timeout=(5, 60)) as response:
+            if response.status_code != 200:
+                print(f'Error! Request failed with status code {response.status_code}!')
+                return None
+            # pass on the raw bytes (decompressed if the server used gzip) without decoding them
+            response.raw.decode_content = True
+            result = consumer(response.raw)
+        # the consumer may fail without raising (e.g. an upload returning None)
+        if result:
+            print(f'Successfully downloaded {self.data_name} dataset from EEA website!')
+        return result
 
     def download_emission_data(self):
         """
         Downloads dataset on greenhouse emissions from EEA website.
         """
-        response = requests.get(self.url)
-        
-        if response.status_code == 200:
-            file_name = f'{self.data_name}.csv'
-            print(f'Successfully downloaded {self.data_name} dataset from EEA website!')
-            with open(file_name, 'w', encoding='utf-8') as file:
-                file.write(response.text)
-        else:
-            file_name = None
-            print(f'Error! Request failed with status code {response.status_code}!')
+        file_name = f'{self.data_name}.csv'
 
-        return file_name
+        def write_to_file(data):
+            with open(file_name, 'wb') as file:
+                shutil.copyfileobj(data, file, length=1024*1024)
+            return file_name
 
+        return self.stream_emission_data(write_to_file)
 
 if __name__=='__main__':
     downloader = DataDownloader()
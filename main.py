@@ -1,5 +1,14 @@
+import functools
 import json
+import logging
+import os
+import random
+import sys
+import threading
 import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from time import sleep
 
 # wrapper classes to facilitate use of the AWS SDK
@@ -29,30 +38,129 @@ LAMBDA_GLUE_POLICY_PATH = 'configs/IAM_roles/lambda_S3_to_Glue_policy.json'
 GLUE_JOB_POLICY_PATH = 'configs/IAM_roles/glue_job_policy.json'
 
 
-def create_lambda_function_with_retry(function_name, creation_params, collection, max_attempts=2, delay=10):
+def create_lambda_function_with_retry(creation_params, max_attempts=6, base_delay=1.0, max_delay=30,
+                                      jitter=0.5, stop_event=None):
     """
-    Creates a lambda function with specified parameters, retrying several times if the first attempt fails.
+    Creates a lambda function with specified parameters, retrying several times if the first attempt fails
+    (e.g. because a newly created IAM role has not propagated yet), with exponentially increasing,
+    jittered delays. Stops retrying once the (optional) stop event is set.
     """
-    c = 0
-    first_attempt = True
-    # while loop until Lambda function is created or maximum number of attempts is exhausted
-    while not collection.contains_resource(name=function_name):
-        if not first_attempt:
-            print('Trying again...')
-        if c >= max_attempts:
-            print("Could not create Lambda function!")
-            return
-            # print("Aborting...")
-            # collection.delete_components_with_retry()
-            # exit()
-        first_attempt = False
-        c += 1
-        sleep(delay)
+    for c in range(max_attempts):
         # create lambda function that is triggered upon .csv upload to an S3 bucket
-        # specify name of Glue job for Lambda function's variables
         lambda_func_obj = S3LambdaFunction(*creation_params)
+        if lambda_func_obj.created:
+            return lambda_func_obj
+        # remove partially created function (e.g. when adding the S3 trigger failed) before trying again
+        if lambda_func_obj.id:
+            lambda_func_obj.delete()
+        if c < max_attempts - 1:
+            # exponential backoff, randomly stretched by up to the jitter fraction
+            delay = min(max_delay, base_delay * 2**c) * (1 + jitter * random.random())
+            if stop_event is not None:
+                if stop_event.wait(delay):
+                    break
+            else:
+                sleep(delay)
+            print('Trying again...')
+    print("Could not create Lambda function!")
+    return None
+
+
+@dataclass(frozen=True)
+class AWSContext:
+    """
+    Session with the AWS SDK and the account details, resolved once and shared
+    by all resources of the cloud infrastructure.
+    """
+    session: boto3.Session
+    account_id: str
+    region: str
+
+
+@functools.lru_cache(maxsize=None)
+def load_aws_details(credentials_file):
+    """
+    Loads AWS security credentials and region from JSON file (only once per file).
+    The file content is shared with the RDS instance, which reads the database credentials from it.
+    """
+    return json.loads(read_config_file(credentials_file))
+
+
+@functools.lru_cache(maxsize=None)
+def get_aws_context(credentials_file='aws_details.json'):
+    """
+    Starts a session with the AWS SDK using the credentials in the JSON file and retrieves
+    the account ID. The result is cached, so that this happens only once per file.
+    The account ID can also be supplied via the environment variable AWS_ACCOUNT_ID
+    (e.g. in CI), which saves the request to the AWS Security Token Service (STS).
+    """
+    aws_details = load_aws_details(credentials_file)
+    access_key = aws_details['aws_access_key_id']
+    secret_access_key = aws_details['aws_secret_access_key']
+    session = boto3.Session(
+        aws_access_key_id=access_key,
+        aws_secret_access_key=secret_access_key
+    )
+    account_id = os.environ.get('AWS_ACCOUNT_ID')
+    if not account_id:
+        sts_client = get_client(session, 'sts')
+        account_id = sts_client.get_caller_identity()['Account']
+    return AWSContext(
+        session=session,
+        account_id=account_id,
+        region=aws_details['region']
+    )
+
+
+def get_subnets(vpc):
+    """
+    Returns the subnets of a VPC.
+    """
+    return vpc.of_type(Subnet)
+
 
-    return lambda_func_obj
+def create_resources(tasks, max_workers=16, stop_event=None):
+    """
+    Creates resources concurrently, following their dependencies. Each task maps the name of 
+    a resource to a tuple (function, dependencies), where dependencies are the names of other tasks.
+    The function is called with the results of its dependencies as keyword arguments as soon as
+    these are available. Returns a dictionary with the results of all tasks.
+
+    If a task fails or the process is interrupted, tasks that have not started yet are cancelled
+    and the stop event is set, signalling long-running tasks (e.g. waiting for the RDS instance) to stop.
+    The exception is only re-raised once the running tasks have finished, so that no resources are
+    created anymore while the infrastructure is being deleted.
+    """
+    if stop_event is None:
+        stop_event = threading.Event()
+    results = {}
+    pending = dict(tasks)
+    running = {}
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        while pending or running:
+            # start all tasks whose dependencies have been created
+            for name, (func, dependencies) in list(pending.items()):
+                if all(dep in results for dep in dependencies):
+                    kwargs = {dep : results[dep] for dep in dependencies}
+                    running[executor.submit(func, **kwargs)] = name
+                    del pending[name]
+            if not running:
+                raise Exception(f"Error! Cannot resolve dependencies of {', '.join(pending)}!")
+            # wait for any running task to finish
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+    except BaseException:
+        stop_event.set()
+        for future in running:
+            future.cancel()
+        raise
+    finally:
+        # wait for the running tasks to finish (or to stop, after the stop event has been set)
+        executor.shutdown(wait=True)
+    return results
 
 
 def build_cloud_infrastructure(credentials_file='aws_details.json'):
@@ -73,32 +181,35 @@ def build_cloud_infrastructure(credentials_file='aws_details.json'):
     # START BUILDING CLOUD INFRASTRUCTURE
     #######################################
     # load AWS security credentials and region from JSON file
-    access_key = None
-    secret_access_key = None
-    region = None
-
     try:
-        with open(credentials_file, 'r') as f:
-            aws_details = json.load(f)
-            access_key = aws_details['aws_access_key_id']
-            secret_access_key = aws_details['aws_secret_access_key']
-            region = aws_details['region']
-    except:
+        aws_details = load_aws_details(credentials_file)
+    except FileNotFoundError:
         print(f"JSON file not found! Make sure that {credentials_file} exists!")
-        exit()
+        sys.exit(1)
+    except json.JSONDecodeError as e:
+        print(f"Invalid JSON file {credentials_file}!\n{e}")
+        sys.exit(1)
+    missing_keys = [key for key in ['aws_access_key_id', 'aws_secret_access_key', 'region']
+                    if key not in aws_details]
+    if missing_keys:
+        print(f"Missing entries in {credentials_file}: {', '.join(missing_keys)}")
+        sys.exit(1)
 
     # start session with AWS SDK
     try:
-        session = boto3.Session(
-            aws_access_key_id=access_key,
-            aws_secret_access_key=secret_access_key
-        )
-        sts_client = session.client('sts')
-        account_id = sts_client.get_caller_identity()['Account']
-        print(f'\nSuccessfully connected to AWS account with account ID {account_id}!')
-    except:
-        print("Error! Could not connect to AWS! Make sure the credentials are correct.")
-        exit()
+        aws_context = get_aws_context(credentials_file)
+        print(f'\nSuccessfully connected to AWS account with account ID {aws_context.account_id}!')
+    except (BotoCoreError, ClientError) as e:
+        print(f"Error! Could not connect to AWS! Make sure the credentials are correct.\n{e}")
+        sys.exit(1)
+    session = aws_context.session
+    account_id = aws_context.account_id
+    region = aws_context.region
+
+    # create the clients needed for building the infrastructure in the background,
+    # while waiting for the user's confirmation (IAM is a global service without region)
+    get_executor().submit(warm_up_clients, session, ['iam'])
+    get_executor().submit(warm_up_clients, session, ['ec2', 's3', 'rds', 'glue', 'lambda'], region)
 
     # create a collection of AWS services to make it easier to delete all of them later
     AWS_architecture = AWSServiceCollection()
@@ -111,46 +222,71 @@ def build_cloud_infrastructure(credentials_file='aws_details.json'):
         print('\nBuilding cloud infrastructure...')        
     else:
         print('Exiting')
-        exit()
+        sys.exit()
 
     try:
+        # the resources are created concurrently, each as soon as the resources it depends on exist;
+        # each task maps a name to a function creating the resource and the names of its dependencies,
+        # whose results are passed to the function as keyword arguments
+        tasks = {}
+        # set if creating the resources is aborted, to stop tasks that are waiting (for other resources)
+        stop_event = threading.Event()
+
         #############
         # CREATE VPC
         #############
         # create VPC with 2 subnets
         num_subnets = 2
-        vpc = VPC(session, region, num_subnets, VPC_NAME, collections=[AWS_architecture])
-        # using multiple subnets across different availability zones (AZs) 
-        # is recommended for RDS instance to achieve higher availability
-        subnets = [comp for comp in vpc.components if isinstance(comp, Subnet)]
+        tasks['vpc'] = (lambda: VPC(session, region, num_subnets, VPC_NAME, collections=[AWS_architecture]), [])
 
         # create a custom routing table and internet gateway as components of the VPC
-        routing_table = RoutingTable(session, region, vpc.id, subnets, collections=[vpc])
-        internet_gateway = InternetGateway(session, region, vpc_id=vpc.id, collections=[vpc])
+        tasks['routing_table'] = (lambda vpc: RoutingTable(session, region, vpc.id, get_subnets(vpc),
+                                                          collections=[vpc]), ['vpc'])
+        tasks['internet_gateway'] = (lambda vpc: InternetGateway(session, region, vpc_id=vpc.id,
+                                                                collections=[vpc]), ['vpc'])
         # allow all internet traffic into public subnets
-        routing_table.add_route(internet_gateway.id, '0.0.0.0/0')
+        tasks['route'] = (lambda routing_table, internet_gateway: routing_table.add_route(internet_gateway.id, '0.0.0.0/0'),
+                          ['routing_table', 'internet_gateway'])
 
         #######################################
         # CREATE DATA WAREHOUSE (RDS INSTANCE)
         #######################################
-        # Note: creating the RDS instance takes the longest, so create it first to save some time
+        # Note: creating the RDS instance takes the longest, so create it as early as possible
         # create security group as component of the VPC
-        rds_security_group = SecurityGroup(session, region, vpc.id, f'{RDS_NAME}_security_group',
+        tasks['rds_security_group'] = (lambda vpc: SecurityGroup(session, region, vpc.id, f'{RDS_NAME}_security_group',
                                         description=f"Security Group for {RDS_NAME} RDS Instance", 
-                                        json_file=SECURITY_GROUP_RDS_PATH, collections=[vpc])
+                                        json_file=SECURITY_GROUP_RDS_PATH, collections=[vpc]), ['vpc'])
 
         # create PostgreSQL RDS instance as data warehouse
-        data_warehouse = RDSInstance(session, region, RDS_NAME, 'aws_details.json',
-                                    security_groups=[rds_security_group], subnets=subnets,
-                                    collections=subnets)
+        # using multiple subnets across different availability zones (AZs) 
+        # is recommended for RDS instance to achieve higher availability
+        def create_data_warehouse(vpc, rds_security_group):
+            subnets = get_subnets(vpc)
+            return RDSInstance(session, region, RDS_NAME, credentials_file,
+                               security_groups=[rds_security_group], subnets=subnets,
+                               collections=subnets)
+        tasks['data_warehouse'] = (create_data_warehouse, ['vpc', 'rds_security_group'])
+
+        # name of a new database to be created on the RDS instance (data warehouse)
+        database_name = 'greenhouse_gas_emissions'
+        # use typical PostgreSQL port
+        port = '5432'
+
+        def set_up_database(data_warehouse):
+            # retrieve assigned host name for the RDS instance (the data warehouse)
+            # this may cause some delay as fully booting up the RDS instance can take a while
+            data_warehouse.retrieve_hostname(stop_event=stop_event)
+            # create database
+            data_warehouse.create_database(database_name, port)
+        tasks['database'] = (set_up_database, ['data_warehouse'])
 
         ####################
         # CREATE S3 BUCKETS
         ####################
         # create S3 buckets for raw and processed data and script storage (object storage)
-        bucket_script = S3Bucket(session, region, BUCKET_NAME_SCRIPT, collections=[AWS_architecture])
-        bucket_source = S3Bucket(session, region, BUCKET_NAME_SOURCE, collections=[AWS_architecture])
-        bucket_sink = S3Bucket(session, region, BUCKET_NAME_SINK, collections=[AWS_architecture])
+        tasks['bucket_script'] = (lambda: S3Bucket(session, region, BUCKET_NAME_SCRIPT, collections=[AWS_architecture]), [])
+        tasks['bucket_source'] = (lambda: S3Bucket(session, region, BUCKET_NAME_SOURCE, collections=[AWS_architecture]), [])
+        tasks['bucket_sink'] = (lambda: S3Bucket(session, region, BUCKET_NAME_SINK, collections=[AWS_architecture]), [])
 
         # upload the scripts for the ETL process and Lambda handlers to an S3 bucket
         glue_script_etl = 'etl_process.py'
@@ -165,119 +301,119 @@ def build_cloud_infrastructure(credentials_file='aws_details.json'):
             'ETL Lambda deployment package' : lambda_zip_etl,
             'Warehouse Lambda deployment package' : lambda_zip_warehouse
         }
-        # upload the files to a dedicated S3 bucket
-        print("Uploading ETL script and Lambda function deployment packages to S3 bucket")
-        for name, file in path_dict.items():
+
+        def upload_script(name, file, bucket_script):
             full_path = f'scripts/{file}'
             if os.path.exists(full_path):
-                bucket_script.upload_data(full_path, file)
-                print(f'Uploaded {full_path} to S3 bucket')
+                if bucket_script.upload_data(full_path, file):
+                    print(f'Uploaded {full_path} to S3 bucket')
             else:
                 print(f"Cannot find {name} path!")
+
+        def upload_scripts(bucket_script):
+            # upload the files to a dedicated S3 bucket concurrently
+            print("Uploading ETL script and Lambda function deployment packages to S3 bucket")
+            with ThreadPoolExecutor(max_workers=len(path_dict)) as executor:
+                futures = [executor.submit(upload_script, name, file, bucket_script)
+                           for name, file in path_dict.items()]
+                for future in futures:
+                    future.result()
+        tasks['scripts'] = (upload_scripts, ['bucket_script'])
             
         ####################################
         # CREATE ETL PROCESS (AWS GLUE JOB)
         ####################################
         # full path of the ETL script
-        glue_script_etl_loc = f's3://{bucket_script.name}/{glue_script_etl}'
+        glue_script_etl_loc = f's3://{BUCKET_NAME_SCRIPT}/{glue_script_etl}'
 
         # create associated IAM role
-        glue_job_policy = IAMPolicy(session, f'{GLUE_JOB_NAME}-policy', region,
+        tasks['glue_job_policy'] = (lambda: IAMPolicy(session, f'{GLUE_JOB_NAME}-policy', region,
                                     json_file=GLUE_JOB_POLICY_PATH, account_id=account_id,
-                                    collections=[AWS_architecture])
-
-        glue_job_role = IAMRole(session, f'{GLUE_JOB_NAME}-role', 'glue.amazonaws.com',
-                                policies=[glue_job_policy], collections=[AWS_architecture])
-
-        # specify variables for Glue run
-        arguments_glue = {
-            '--SOURCE_BUCKET_NAME' : bucket_source.name,
-            '--SINK_BUCKET_NAME' : bucket_sink.name,
-            # file path to the file containing the data
-            '--SOURCE_FILEPATH' : DATA_OBJECT_KEY,
-            '--OUTPUT_FOLDER_NAME' : PROCESSED_DATA_OBJECT_KEY
-        }
-
-        etl_glue_job = AWSGlueJob(session, region, 'etl-glue-job', glue_job_role, glue_script_etl_loc,
-                                variables=arguments_glue, collections=[AWS_architecture])
+                                    collections=[AWS_architecture]), [])
+
+        tasks['glue_job_role'] = (lambda glue_job_policy: IAMRole(session, f'{GLUE_JOB_NAME}-role', 'glue.amazonaws.com',
+                                policies=[glue_job_policy], collections=[AWS_architecture]), ['glue_job_policy'])
+
+        def create_glue_job(glue_job_role, bucket_source, bucket_sink):
+            # specify variables for Glue run
+            arguments_glue = {
+                '--SOURCE_BUCKET_NAME' : bucket_source.name,
+                '--SINK_BUCKET_NAME' : bucket_sink.name,
+                # file path to the file containing the data
+                '--SOURCE_FILEPATH' : DATA_OBJECT_KEY,
+                '--OUTPUT_FOLDER_NAME' : PROCESSED_DATA_OBJECT_KEY
+            }
+            return AWSGlueJob(session, region, GLUE_JOB_NAME, glue_job_role, glue_script_etl_loc,
+                              variables=arguments_glue, collections=[AWS_architecture])
+        tasks['etl_glue_job'] = (create_glue_job, ['glue_job_role', 'bucket_source', 'bucket_sink'])
 
         #########################################
         # CREATE LAMBDA FUNCTIONS FOR AUTOMATION
         #########################################
         # create IAM role for Lambda function to trigger the Glue job
-        glue_lambda_policy = IAMPolicy(session, f'{LAMBDA_NAME_GLUE}-policy', region, 
+        tasks['glue_lambda_policy'] = (lambda: IAMPolicy(session, f'{LAMBDA_NAME_GLUE}-policy', region, 
                                     json_file=LAMBDA_GLUE_POLICY_PATH, account_id=account_id,
-                                    collections=[AWS_architecture])
+                                    collections=[AWS_architecture]), [])
 
-        glue_lambda_role = IAMRole(session, f'{LAMBDA_NAME_GLUE}-role', 'lambda.amazonaws.com',
-                                policies=[glue_lambda_policy], collections=[AWS_architecture])
+        tasks['glue_lambda_role'] = (lambda glue_lambda_policy: IAMRole(session, f'{LAMBDA_NAME_GLUE}-role', 'lambda.amazonaws.com',
+                                policies=[glue_lambda_policy], collections=[AWS_architecture]), ['glue_lambda_policy'])
 
         # create IAM role for Lambda function to transfer processed data into data warehouse (RDS PostgreSQL database)
-        rds_lambda_policy = IAMPolicy(session, f'{LAMBDA_NAME_RDS}-policy', region, 
+        tasks['rds_lambda_policy'] = (lambda: IAMPolicy(session, f'{LAMBDA_NAME_RDS}-policy', region, 
                                     json_file=LAMBDA_RDS_POLICY_PATH, account_id=account_id,
-                                    collections=[AWS_architecture])
-
-        rds_lambda_role = IAMRole(session, f'{LAMBDA_NAME_RDS}-role', 'lambda.amazonaws.com',
-                                policies=[rds_lambda_policy], collections=[AWS_architecture])
+                                    collections=[AWS_architecture]), [])
 
+        tasks['rds_lambda_role'] = (lambda rds_lambda_policy: IAMRole(session, f'{LAMBDA_NAME_RDS}-role', 'lambda.amazonaws.com',
+                                policies=[rds_lambda_policy], collections=[AWS_architecture]), ['rds_lambda_policy'])
 
         # parameters for creating Lambda function for automatically starting ETL job
         glue_lambda_handler = 'lambda_handler_etl.start_glue_job'
 
-        variables_etl_job = {
-            'JOB_NAME' : etl_glue_job.name,
-            'OUTPUT_FOLDER_NAME' : PROCESSED_DATA_OBJECT_KEY
-        }
-        etl_lambda_function_params = (session, region, account_id, LAMBDA_NAME_GLUE, glue_lambda_handler,
-                                    lambda_zip_etl, BUCKET_NAME_SCRIPT, BUCKET_NAME_SOURCE,
-                                    glue_lambda_role, variables_etl_job, [AWS_architecture])
-        
-        # depending on delay after creating IAM role, creation of Lambda functions may fail on the first try
-        # try as many times as necessary, using sleep(...) as artificial delay
-        etl_lambda_function = create_lambda_function_with_retry(LAMBDA_NAME_GLUE,
-                                                                etl_lambda_function_params,
-                                                                AWS_architecture)
+        def create_etl_lambda_function(glue_lambda_role, etl_glue_job, bucket_source, scripts):
+            variables_etl_job = {
+                'JOB_NAME' : etl_glue_job.name,
+                'OUTPUT_FOLDER_NAME' : PROCESSED_DATA_OBJECT_KEY
+            }
+            etl_lambda_function_params = (session, region, account_id, LAMBDA_NAME_GLUE, glue_lambda_handler,
+                                        lambda_zip_etl, BUCKET_NAME_SCRIPT, bucket_source.name,
+                                        glue_lambda_role, variables_etl_job, [AWS_architecture])
+            
+            # depending on delay after creating IAM role, creation of Lambda functions may fail on the first try
+            # try as many times as necessary, waiting longer after each failed attempt
+            return create_lambda_function_with_retry(etl_lambda_function_params, stop_event=stop_event)
+        tasks['etl_lambda_function'] = (create_etl_lambda_function,
+                                        ['glue_lambda_role', 'etl_glue_job', 'bucket_source', 'scripts'])
 
         # parameters for creating Lambda function for automatically storing processed data in warehouse
         rds_lambda_handler = 'lambda_handler_warehouse.transfer_processed_data'
 
-        # retrieve assigned host name for the RDS instance (the data warehouse)
-        # this may cause some delay as fully booting up the RDS instance can take a while
-        data_warehouse.retrieve_hostname()
-
-        # name of a new database to be created on the RDS instance (data warehouse)
-        database_name = 'greenhouse_gas_emissions'
-        # use typical PostgreSQL port
-        port = '5432'
-        # create database
-        data_warehouse.create_database(database_name, port)
-        # install extension that allows RDS instance to access data from S3 bucket
-        data_warehouse.install_extension('aws_s3', database_name, port)
-
-        # environment variables for Lambda functions (S3 to warehouse/RDS instance)
-        variables_warehouse = {
-            'BUCKET_NAME' : bucket_sink.name, # name of bucket containing the processed data
-            'OUTPUT_PATH' : PROCESSED_DATA_OBJECT_KEY, # directory that will contain parquet files
-            'DB_HOSTNAME' : data_warehouse.hostname,
-            'DB_NAME' : database_name,
-            'DB_USERNAME' : data_warehouse.username,
-            'DB_PASSWORD' : data_warehouse.password,
-            'PORT' : port,
-            'REGION' : region,
-            'ACCESS_KEY' : access_key,
-            'SECRET_KEY' : secret_access_key
-        }
-
-        # define parameters for a new Lambda function to transfer processed data to warehouse
-        warehouse_lambda_function_params = (session, region, account_id, LAMBDA_NAME_RDS, rds_lambda_handler,
-                                            lambda_zip_warehouse, BUCKET_NAME_SCRIPT, BUCKET_NAME_SINK,
-                                            rds_lambda_role, variables_warehouse, [AWS_architecture])
-
-        # depending on delay after creating IAM role, creation of Lambda functions may fail on the first try
-        # try as many times as necessary, using sleep(...) as artificial delay
-        warehouse_lambda_function = create_lambda_function_with_retry(LAMBDA_NAME_RDS,
-                                                                    warehouse_lambda_function_params,
-                                                                    AWS_architecture)
+        def create_warehouse_lambda_function(rds_lambda_role, data_warehouse, database, bucket_sink, scripts):
+            # environment variables for Lambda functions (S3 to warehouse/RDS instance)
+            variables_warehouse = {
+                'BUCKET_NAME' : bucket_sink.name, # name of bucket containing the processed data
+                'OUTPUT_PATH' : PROCESSED_DATA_OBJECT_KEY, # directory that will contain the CSV files
+                'DB_HOSTNAME' : data_warehouse.hostname,
+                'DB_NAME' : database_name,
+                'DB_USERNAME' : data_warehouse.username,
+                'DB_PASSWORD' : data_warehouse.password,
+                'PORT' : port
+            }
+
+            # define parameters for a new Lambda function to transfer processed data to warehouse
+            warehouse_lambda_function_params = (session, region, account_id, LAMBDA_NAME_RDS, rds_lambda_handler,
+                                                lambda_zip_warehouse, BUCKET_NAME_SCRIPT, bucket_sink.name,
+                                                rds_lambda_role, variables_warehouse, [AWS_architecture])
+
+            # depending on delay after creating IAM role, creation of Lambda functions may fail on the first try
+            # try as many times as necessary, waiting longer after each failed attempt
+            return create_lambda_function_with_retry(warehouse_lambda_function_params, stop_event=stop_event)
+        tasks['warehouse_lambda_function'] = (create_warehouse_lambda_function,
+                                              ['rds_lambda_role', 'data_warehouse', 'database',
+                                               'bucket_sink', 'scripts'])
+
+        resources = create_resources(tasks, stop_event=stop_event)
+        data_warehouse = resources['data_warehouse']
+        bucket_source = resources['bucket_source']
 
     except (KeyboardInterrupt, Exception) as e:
         # make sure that infrastructure is deleted before quitting the program
@@ -288,7 +424,7 @@ def build_cloud_infrastructure(credentials_file='aws_details.json'):
             print("Aborting...")
         AWS_architecture.delete_components_with_retry()
         print('\nExiting')
-        exit()
+        sys.exit(1)
 
     print("Finished setting up cloud infrastructure!\n")
 
@@ -296,9 +432,6 @@ def build_cloud_infrastructure(credentials_file='aws_details.json'):
     # CREATE INTERACTIVE SESSION TO ALLOW INTERACTION WITH AND DELETION OF INFRASTRUCTURE
     #######################################################################################
 
-    POSSIBLE_ANSWERS_FOR_EXIT =  ['delete', 'exit']
-    ans = None
-
     print("You can now upload new data by typing 'upload'. This will start an automatic ETL job.\n") 
     print("You can then access the processed data in this PostgreSQL database:")
     print(f"Hostname: {data_warehouse.hostname}")
@@ -309,45 +442,57 @@ def build_cloud_infrastructure(credentials_file='aws_details.json'):
     print("WARNING! This will delete all data that has not been backed up from the cloud!")
     print("If you want to remove the components later manually, type 'exit'.\n")
 
-    # start session using while loop
-    while ans not in POSSIBLE_ANSWERS_FOR_EXIT:
-        ans = input('> ')
-
-        if ans.lower() == 'delete':
-            print('')
-            AWS_architecture.delete_components_with_retry()
-            print('\nDone!')
-            exit()
-
-        elif ans.lower() == 'exit':
-            print("\nExiting without deleting all AWS resources!")
-            print("Please remember to delete the following components later:")
-            AWS_architecture.list()
-            exit()
-
-        elif ans.lower() == 'upload':
-            # download data from EEA website
-            downloaded_data = False
-            print("\nDownloading data on greenhouse gas emissions...")
-            try:
-                downloader = DataDownloader()
-                filename = downloader.download_emission_data()
-                downloaded_data = True
-            except:
-                filename = None
-                print("Failed to download data!\n")
-            # upload data to cloud infrastructure 
-            if downloaded_data:
-                print(f"Uploading {filename} to cloud infrastructure...")
-                bucket_source.upload_data(filename, DATA_OBJECT_KEY)
-                print("You can check the ETL job status under 'AWS Glue > ETL jobs' or 'CloudWatch > Logs' in your AWS account.\n")
-                print("After the ETL job has finished, you can access the data in the PostgreSQL database.\n")
+    def delete_infrastructure():
+        print('')
+        AWS_architecture.delete_components_with_retry()
+        print('\nDone!')
+        sys.exit()
+
+    def exit_session():
+        print("\nExiting without deleting all AWS resources!")
+        print("Please remember to delete the following components later:")
+        AWS_architecture.list()
+        sys.exit()
+
+    def upload_emission_data():
+        # stream data from EEA website directly to cloud infrastructure, without storing it locally
+        print("\nUploading data on greenhouse gas emissions to cloud infrastructure...")
+        try:
+            downloader = DataDownloader()
+            uploaded = downloader.stream_emission_data(
+                lambda data: bucket_source.upload_fileobj(data, DATA_OBJECT_KEY)
+            )
+        except Exception as e:
+            uploaded = None
+            print(f"Error while downloading or uploading the data: {e}")
+        if not uploaded:
+            print("Failed to upload the data to the S3 bucket! Please try again.\n")
+        else:
+            print("You can check the ETL job status under 'AWS Glue > ETL jobs' or 'CloudWatch > Logs' in your AWS account.\n")
+            print("After the ETL job has finished, you can access the data in the PostgreSQL database.\n")
+
+    # functions handling the commands of the interactive session
+    commands = {
+        'delete' : delete_infrastructure,
+        'exit' : exit_session,
+        'upload' : upload_emission_data,
+    }
+
+    # start session using while loop ('delete' and 'exit' end the program)
+    while True:
+        # normalize the command once; only recognized commands make any API calls
+        ans = input('> ').strip().lower()
+        if not ans:
+            continue
+        command = commands.get(ans)
+        if command:
+            command()
         else:
             print(f"\nUnknown command {ans}! Try again!\n")
-        
-
 
 if __name__ == '__main__':
+    # show status messages of the AWS wrapper classes in the command line
+    logging.basicConfig(level=logging.INFO, format='%(message)s', handlers=[logging.StreamHandler()])
     # create AWS cloud infrastructure for data warehouse 
     # and start interactive session in command line
     build_cloud_infrastructure()
\ No newline at end of file
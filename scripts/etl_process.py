@@ -1,13 +1,18 @@
 import sys
-from itertools import chain
 from awsglue.utils import getResolvedOptions
 from pyspark.sql import SparkSession
 from pyspark.sql.functions import *
 from pyspark.sql.types import *
 
 
-# create a Spark session
-spark = SparkSession.builder.appName('ETLJob').getOrCreate()
+# create a Spark session; the dataset is small, so avoid spreading it over many
+# shuffle partitions and let adaptive query execution (Spark 3, Glue 3.0) coalesce them
+spark = SparkSession.builder \
+    .appName('ETLJob') \
+    .config('spark.sql.adaptive.enabled', 'true') \
+    .config('spark.sql.adaptive.coalescePartitions.enabled', 'true') \
+    .config('spark.sql.shuffle.partitions', '1') \
+    .getOrCreate()
 
 args = getResolvedOptions(
     sys.argv, 
@@ -63,45 +68,39 @@ country_code_map = {
     "SK": "Slovakia"
 }
 
-# create mapping expression for PySpark to map country codes to full country names
-mapping_expr = create_map([lit(x) for x in chain(*country_code_map.items())])
+# small table for mapping country codes to full country names; joining it (broadcast to all
+# executors) selects the countries and maps their names with a single hash lookup per row
+df_countries = spark.createDataFrame(list(country_code_map.items()), ['CountryCode', 'Country'])
 
 try:
+    # extract, transform and load the data as a single Spark query, which is only
+    # executed when writing the result; any error fails the job run
     # extract data from .csv file in S3 bucket
     df_raw = spark.read \
         .format('csv') \
         .options(delimiter=',', header='True') \
         .load(input_path)
-except Exception as e:
-    print("Error! Could not extract CSV data:", e)
 
-try:
-    # clean and transform data
+    # clean and transform data; filter the rows first, so that the remaining operations only
+    # process the selected countries and the total GHG emissions (rows with a missing country
+    # code or gas are dropped by the filter and the join already)
     # Note: when storing data, column names my not contain any character(s) among " ,;{}()\n\t="
     df_trans = df_raw \
         .select('CountryCode', 'Year', 'Scenario', 'Category', 'Gas', 'Reported Value') \
-        .dropna(subset=['CountryCode', 'Year', 'Scenario', 'Category', 'Gas', 'Reported Value'], how='any') \
-        .filter((col('Gas') == 'Total GHG emissions (ktCO2e)') 
-                & col('CountryCode').isin(list(country_code_map.keys()))) \
-        .withColumn('Unit', when((col('Gas') == 'Total GHG emissions (ktCO2e)'), 'kt CO2 equivalent') \
-                    .otherwise(lit(None))) \
-        .withColumn('Gas', when((col('Gas') == 'Total GHG emissions (ktCO2e)'), 'Total GHG emissions') \
-                    .otherwise(col('Gas'))) \
-        .withColumnRenamed('Total GHG emissions (ktCO2e)', 'Total GHG emissions') \
+        .filter(col('Gas') == 'Total GHG emissions (ktCO2e)') \
+        .join(broadcast(df_countries), 'CountryCode', 'inner') \
+        .dropna(subset=['Year', 'Scenario', 'Category', 'Reported Value'], how='any') \
+        .withColumn('Unit', lit('kt CO2 equivalent')) \
+        .withColumn('Gas', lit('Total GHG emissions')) \
         .withColumnRenamed('Reported Value', 'ReportedValue') \
-        .withColumn('Country', mapping_expr[col("CountryCode")]) \
         .select('Country', 'Year', 'Scenario', 'Category', 'Gas', 'ReportedValue', 'Unit')
-except Exception as e:
-    print("Error! Could not transform data:", e)
 
-try:
-    # store processed data in another S3 bucket
-    df_trans.write \
+    # store processed data in another S3 bucket; the data is small, so write a single file,
+    # which the Lambda function can import into the database at once
+    df_trans.coalesce(1).write \
         .format("csv") \
         .mode("overwrite") \
         .save(output_path)
 except Exception as e:
-    print("Error! Could store transformed data:", e)
-
-# stop Spark session
-spark.stop()
\ No newline at end of file
+    print("Error! ETL process failed:", e)
+    raise
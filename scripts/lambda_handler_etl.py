@@ -2,12 +2,47 @@ import os
 import boto3
 
 
+# the client is created once per Lambda container and reused by warm invocations
+glue_client = boto3.client('glue')
+
+# states of job runs that have processed (or are processing) their source data
+PROCESSED_STATES = ('STARTING', 'RUNNING', 'SUCCEEDED')
+
+
+def get_source_etag(event):
+    """
+    Returns the ETag of the uploaded object that triggered the S3 event (if any).
+    """
+    try:
+        return event['Records'][0]['s3']['object']['eTag']
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def get_last_source_etag(job_name):
+    """
+    Returns the ETag of the source data processed by the latest job run that
+    did not fail, as passed to the job run by start_glue_job.
+    """
+    response = glue_client.get_job_runs(JobName=job_name, MaxResults=10)
+    # job runs are returned from latest to oldest
+    for job_run in response['JobRuns']:
+        if job_run['JobRunState'] in PROCESSED_STATES:
+            return job_run.get('Arguments', {}).get('--SOURCE_ETAG')
+    return None
+
+
 def start_glue_job(event, context):
     """
-    Start AWS Glue job.
+    Start AWS Glue job, unless the uploaded data has already been processed
+    (i.e. the same object was uploaded again).
     """
     job_name = os.environ['JOB_NAME']
-    glue_client = boto3.client('glue')
-    response = glue_client.start_job_run(JobName=job_name)
+    etag = get_source_etag(event)
+    if etag is not None and etag == get_last_source_etag(job_name):
+        print(f"Source data (ETag {etag}) has already been processed, skipping Glue job")
+        return {'skipped' : True}
+    # record the ETag with the job run (the job ignores arguments it doesn't use)
+    arguments = {'--SOURCE_ETAG' : etag} if etag is not None else {}
+    response = glue_client.start_job_run(JobName=job_name, Arguments=arguments)
     return response
-
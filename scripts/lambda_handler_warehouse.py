@@ -1,15 +1,34 @@
 import os
+import functools
 import json
 import boto3
+from concurrent.futures import ThreadPoolExecutor
 from sqlalchemy import create_engine, text
 
 
+# maximum number of files that are imported concurrently (each through its own connection)
+MAX_IMPORT_WORKERS = 8
+
+# clients and engines are created once per Lambda container and reused by warm invocations
+s3 = boto3.client('s3')
+
+
+@functools.lru_cache(maxsize=None)
+def get_engine(db_uri):
+    """
+    Returns the SQLAlchemy engine for the database, creating it on first use.
+    Stale pooled connections (e.g. after the container was frozen) are replaced before use.
+    """
+    return create_engine(db_uri, pool_size=MAX_IMPORT_WORKERS, pool_pre_ping=True, pool_recycle=300)
+
+
 def transfer_processed_data(event, context):
     """
     Transfers processed data from S3 bucket to RDS instance.
     """
-    # Note: since Apache Spark processes the data in parallel,
-    # it may generate multiple parquet files.
+    # Note: the Glue job coalesces its output into a single CSV file (without header),
+    # which is loaded into the database with COPY; any other CSV files in the
+    # directory are loaded as well.
     # output_path variable is the name of the directory containing the files
     output_path_folder = os.environ['OUTPUT_PATH']
     hostname = os.environ['DB_HOSTNAME']
@@ -18,19 +37,13 @@ def transfer_processed_data(event, context):
     password = os.environ['DB_PASSWORD']
     port = os.environ['PORT']
     bucket_name = os.environ['BUCKET_NAME']
-    region = os.environ['REGION']
-    access_key = os.environ['ACCESS_KEY']
-    secret_key = os.environ['SECRET_KEY']
    
-    # Concatenate the individual dataframes before transfer to the database
-    # Note: using fastparquet instead of pyarrow since it is more lightweight,
-    # deployment package would otherwise exceed the maximum size for AWS Lambda
-    s3 = boto3.resource('s3')
-    bucket = s3.Bucket(bucket_name)
-
-    # all CSV files
-    csv_files = [obj.key for obj in bucket.objects.filter(Prefix=output_path_folder) 
-                 if obj.key.endswith('.csv')]
+    # list all CSV files in the output folder (the trailing slash restricts the listing
+    # to the folder itself, not to other folders starting with the same name)
+    prefix = output_path_folder if output_path_folder.endswith('/') else output_path_folder + '/'
+    paginator = s3.get_paginator('list_objects_v2')
+    csv_files = [obj['Key'] for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix)
+                 for obj in page.get('Contents', []) if obj['Key'].endswith('.csv')]
     
     if len(csv_files) == 0:
         print(f"NO CSV FILES WERE FOUND IN {bucket_name}")
@@ -45,8 +58,8 @@ def transfer_processed_data(event, context):
     table_name = 'european_ghg_projections'
 
     try:
-        # create SQLAlchemy engine and create new database
-        engine = create_engine(db_uri)
+        # get SQLAlchemy engine (reused by warm invocations)
+        engine = get_engine(db_uri)
 
         # create table with unique keyword, this allows for update of the reported value
         # upon conflict (see import_into_real_table_command below)
@@ -63,49 +76,63 @@ def transfer_processed_data(event, context):
             UNIQUE (Country, Year, Scenario, Category, Gas, Unit)
         );
         """
-        # use temporary data to which the data is uploaded from the S3 bucket first
-        # (will be deleted afterwards)
-        create_temporary_table_command = f"""
-        CREATE TEMPORARY TABLE temp_{table_name} AS TABLE {table_name} WITH NO DATA;
+        # use a staging table to which the data is uploaded from the S3 bucket first
+        # (will be deleted afterwards); unlike a temporary table, it can be loaded
+        # through several connections, and being unlogged, it skips the write-ahead log
+        # (the name is unique per invocation, so that concurrent invocations don't interfere)
+        staging_table_name = f"staging_{table_name}_{context.aws_request_id.replace('-', '')[:16]}"
+        create_staging_table_command = f"""
+        CREATE UNLOGGED TABLE {staging_table_name} AS TABLE {table_name} WITH NO DATA;
+        """
+        # import the data into the actual table, handling conflicts with duplicates
+        # (update upon data entry with new reported value); all files are merged at once,
+        # so keep a single row per key, as a row cannot be updated twice by the same statement
+        import_into_real_table_command = f"""
+        INSERT INTO {table_name} (Country, Year, Scenario, Category, Gas, ReportedValue, Unit)
+        SELECT DISTINCT ON (Country, Year, Scenario, Category, Gas, Unit)
+            Country, Year, Scenario, Category, Gas, ReportedValue, Unit
+        FROM {staging_table_name} 
+        ORDER BY Country, Year, Scenario, Category, Gas, Unit
+        ON CONFLICT (Country, Year, Scenario, Category, Gas, Unit) DO UPDATE
+        SET ReportedValue = EXCLUDED.ReportedValue;
         """
 
-        with engine.connect() as connection:
-            connection.execute(text("commit"))
+        with engine.begin() as connection:
             connection.execute(text(create_table_command))
-            connection.execute(text(create_temporary_table_command))
+            connection.execute(text(create_staging_table_command))
         print(f"Created new database table (if not existent) {table_name}")
 
-        # import each CSV file into database separately
-        for file in csv_files:
-            s3_import_command = f"""
-            SELECT aws_s3.table_import_from_s3 (
-                'temp_{table_name}', 
-                'Country, Year, Scenario, Category, Gas, ReportedValue, Unit',
-                'DELIMITER '','' CSV',
-                '{bucket_name}', 
-                '{file}', 
-                '{region}', 
-                '{access_key}', 
-                '{secret_key}',
-                ''
-            );
-            """
-            # import the data into the actual table, handling conflicts with duplicates
-            # (update upon data entry with new reported value)
-            import_into_real_table_command = f"""
-            INSERT INTO {table_name} (Country, Year, Scenario, Category, Gas, ReportedValue, Unit)
-            SELECT Country, Year, Scenario, Category, Gas, ReportedValue, Unit
-            FROM temp_{table_name} 
-            ON CONFLICT (Country, Year, Scenario, Category, Gas, Unit) DO UPDATE
-            SET ReportedValue = EXCLUDED.ReportedValue;
-            """
+        # stream each CSV file from the S3 bucket into the staging table using the COPY protocol
+        copy_command = f"""
+        COPY {staging_table_name} (Country, Year, Scenario, Category, Gas, ReportedValue, Unit)
+        FROM STDIN WITH (FORMAT CSV, DELIMITER ',');
+        """
 
-            with engine.connect() as connection: 
-                connection.execute(text(s3_import_command))
-                connection.execute(text(import_into_real_table_command))  
-                connection.execute(text("commit"))
+        def import_file(file):
+            body = s3.get_object(Bucket=bucket_name, Key=file)['Body']
+            # use the underlying psycopg2 connection, which supports COPY
+            connection = engine.raw_connection()
+            try:
+                with connection.cursor() as cursor:
+                    cursor.copy_expert(copy_command, body, size=1024*1024)
+                connection.commit()
+            finally:
+                connection.close()
             print(f"Imported {file} to database {dbname}")
 
+        try:
+            # import the CSV files concurrently, then merge them into the actual table at once
+            with ThreadPoolExecutor(max_workers=max(1, min(MAX_IMPORT_WORKERS, len(csv_files)))) as executor:
+                list(executor.map(import_file, csv_files))
+            with engine.begin() as connection:
+                # don't wait for the WAL flush on commit (if lost in a crash, the import can simply be repeated)
+                connection.execute(text("SET LOCAL synchronous_commit TO OFF;"))
+                connection.execute(text(import_into_real_table_command))
+            print(f"Merged {len(csv_files)} file(s) into table {table_name}")
+        finally:
+            with engine.begin() as connection:
+                connection.execute(text(f"DROP TABLE IF EXISTS {staging_table_name};"))
+
     except Exception as e:
         return {
             'body': json.dumps(f'Failed to load data to PostgreSQL: {e}')
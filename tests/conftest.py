@@ -0,0 +1,7 @@
+import sys
+import pathlib
+
+# make the self-written Python modules in the repository root importable,
+# independent of the directory the tests are run from
+ROOT_DIR = pathlib.Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
@@ -1,15 +1,15 @@
 import abc
+import contextlib
+import io
 import os
 import json
 import boto3
-import botocore
 import moto
 import pytest
 import pandas as pd
+from botocore.exceptions import ClientError, WaiterError
+from collections import Counter
 
-# for importing the self-written Python modules, change working dir
-if os.path.basename(os.getcwd()) == 'tests':
-    os.chdir('..')
 from aws_service_classes import *
 
 
@@ -17,70 +17,41 @@ REGION = 'ap-southeast-2'
 MOCK_NAME = 'test-warehouse-service'
 DB_MOCK_USER = 'test-user'
 DB_MOCK_PW = 'test-pw'
-SECURITY_GROUP_RDS_PATH = 'configs/security_groups/rds_security_group.json'
-GLUE_JOB_POLICY_PATH = 'configs/IAM_roles/glue_job_policy.json'
+# config files, relative to the repository root (independent of the working dir)
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SECURITY_GROUP_RDS_PATH = os.path.join(ROOT_DIR, 'configs/security_groups/rds_security_group.json')
+GLUE_JOB_POLICY_PATH = os.path.join(ROOT_DIR, 'configs/IAM_roles/glue_job_policy.json')
+# error codes of the API responses for services that do not exist (RDS, Glue, Lambda)
+NOT_FOUND_ERROR_CODES = ('DBInstanceNotFound', 'EntityNotFoundException', 'ResourceNotFoundException')
 
 
-@pytest.fixture(scope='class')
-def mock_session(request):
+# moto mocks needed for testing the AWS services:
+# the wrapped services themselves (S3, EC2, IAM, RDS, Glue, Lambda),
+# and STS for retrieving the account ID when creating IAM roles,
+# Glue jobs and Lambda functions
+MOCKED_SERVICES = ['s3', 'ec2', 'sts', 'iam', 'rds', 'glue', 'lambda']
+
+
+@pytest.fixture(scope='session')
+def mock_session():
     """
     Fixture that creates a mock session to test the different AWS services.
+    The mock services are started once per test session and shared by all test classes.
     """
     # setup mock AWS credentials
     aws_access_key = 'mock_access_key'
     aws_secret_key = 'mock_secret_key'
 
-    # nested function to create a boto3 session with fake credentials
-    def set_up_session():
+    # create mock services using the moto module for simulating API calls
+    with contextlib.ExitStack() as stack:
+        for mocked_service in MOCKED_SERVICES:
+            stack.enter_context(getattr(moto, f'mock_{mocked_service}')())
         session = boto3.Session(
             aws_access_key_id=aws_access_key,
             aws_secret_access_key=aws_secret_key,
             region_name=REGION
         )
-        return session
-
-    service = request.param
-    
-    # create mock services using the moto module for simulating API calls
-    # note: sometimes several mock services are needed for the testing
-    if service == 's3':
-        with moto.mock_s3():            
-            session = set_up_session()
-            yield session
-    elif service == 'ec2':
-        with moto.mock_ec2():            
-            session = set_up_session()
-            yield session
-    elif service == 'lambda':
-        # for creating Lambda function, need account ID (from sts client),
-        # an IAM role, and an S3 bucket
-        with moto.mock_sts():
-            with moto.mock_iam(): 
-                with moto.mock_s3():
-                    with moto.mock_lambda():            
-                        session = set_up_session()
-                        yield session
-    elif service == 'glue':
-        # for creating Glue job, need account ID (from sts client),
-        # and an IAM role
-        with moto.mock_sts():
-            with moto.mock_iam(): 
-                with moto.mock_glue():            
-                    session = set_up_session()
-                    yield session
-    elif service == 'iam':
-        # for creating IAM policies/roles, need account ID (from sts client)
-        with moto.mock_sts():
-            with moto.mock_iam():            
-                session = set_up_session()
-                yield session
-    elif service == 'rds':
-        # in order to create RDS instance, also use an mock EC2 service
-        # for creating a VPC and subnets
-        with moto.mock_rds():
-            with moto.mock_ec2():
-                session = set_up_session()
-                yield session
+        yield session
 
 
 ###############################################
@@ -108,7 +79,7 @@ class BaseTestAWSService(abc.ABC):
         raise NotImplementedError
 
     @pytest.fixture(autouse=True)
-    def setup_method(self, mock_session):
+    def setup_method(self, mock_session, tmp_path):
         """
         Set up important instance attributes, create AWSService object.
         Use mock session injected from a pytest fixture.
@@ -117,6 +88,8 @@ class BaseTestAWSService(abc.ABC):
         self.region = REGION
         # assigning mock session on instance level
         self.session = mock_session
+        # per-test directory for local mock files, removed by pytest
+        self.tmp_path = tmp_path
         # this method is implemented by the respective test class
         self.aws_service = self.create_service()
 
@@ -141,13 +114,12 @@ class BaseTestAWSService(abc.ABC):
             raise Exception('Deletion of service failed!')
 
 
-# Note: through the use of the fixture "mock_session" (scope='class')
-# the mock session object is created once per class; setup_method is run
+# Note: through the use of the fixture "mock_session" (scope='session')
+# the mock session object is created once per test session; setup_method is run
 # before every test method, but simply assigns this object
 # to the instance variable "self.session"
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['s3'], indirect=True) 
 class TestS3Bucket(BaseTestAWSService):
     """
     Tests creation and deletion of S3 bucket and file upload.
@@ -163,16 +135,17 @@ class TestS3Bucket(BaseTestAWSService):
         """
         Checks existence of S3 bucket. Implements abstract method of parent class.
         """
-        s3 = self.session.client('s3')
+        s3 = get_client(self.session, 's3', self.region)
         response = s3.list_buckets()
         names = [bucket['Name'] for bucket in response['Buckets']]
         return self.aws_service.name in names
 
-    def test_upload_data(self):
+    def test_upload_data(self, tmp_path):
         """
         Create mock CSV file and test upload function of S3 bucket wrapper class.
         """
-        filepath = 'mockfile.csv'
+        object_key = 'mockfile.csv'
+        filepath = str(tmp_path / object_key)
         mock_data = {
             'col1' : [1, 2, 3],
             'col2' : [2, 3, 4],
@@ -180,30 +153,101 @@ class TestS3Bucket(BaseTestAWSService):
         }
         mock_df = pd.DataFrame(mock_data)
         mock_df.to_csv(filepath)
-        self.aws_service.upload_data(filepath, filepath)
-        # remove mock file from local dir
-        os.remove(filepath)
+        self.aws_service.upload_data(filepath, object_key)
         # extract files from bucket
         bucket_name = self.aws_service.name
-        s3 = boto3.resource('s3')
-        bucket = s3.Bucket(bucket_name)
-        files = [file.key for file in bucket.objects.all()]
+        s3 = get_client(self.session, 's3', self.region)
+        response = s3.list_objects_v2(Bucket=bucket_name)
+        files = [obj['Key'] for obj in response['Contents']]
 
         assert len(files) == 1
-        assert files[0] == filepath
-            
+        assert files[0] == object_key
+
+    def test_upload_fileobj(self):
+        """
+        Test uploading data from a file-like object (e.g. a download stream).
+        """
+        self.aws_service.upload_fileobj(io.BytesIO(b'col1,col2\n1,2\n'), 'mockfile.csv')
+        s3 = get_client(self.session, 's3', self.region)
+        body = s3.get_object(Bucket=self.aws_service.name, Key='mockfile.csv')['Body'].read()
+
+        assert body == b'col1,col2\n1,2\n'
+
+    def test_get_data(self, tmp_path):
+        """
+        Test downloading an object from the bucket to a local file.
+        """
+        s3 = get_client(self.session, 's3', self.region)
+        s3.put_object(Bucket=self.aws_service.name, Key='mockfile.csv', Body=b'col1,col2\n1,2\n')
+        filepath = str(tmp_path / 'mockfile_downloaded.csv')
+        self.aws_service.get_data('mockfile.csv', filepath)
+        with open(filepath, 'rb') as file:
+            data = file.read()
+
+        assert data == b'col1,col2\n1,2\n'
+
+    def test_delete_all_objects(self):
+        """
+        Test deleting all objects of the bucket, using batch deletion.
+        """
+        s3 = get_client(self.session, 's3', self.region)
+        num_objects = 5
+        for i in range(num_objects):
+            s3.put_object(Bucket=self.aws_service.name, Key=f'object{i}.csv', Body=b'test')
+        response = s3.list_objects_v2(Bucket=self.aws_service.name)
+        assert response['KeyCount'] == num_objects
+
+        self.aws_service.delete_all_objects()
+        response = s3.list_objects_v2(Bucket=self.aws_service.name)
+        assert response['KeyCount'] == 0
+
+    def test_delete_all_objects_errors(self):
+        """
+        Test that objects that could not be deleted are reported as a failure.
+        """
+        s3 = get_client(self.session, 's3', self.region)
+        s3.put_object(Bucket=self.aws_service.name, Key='object.csv', Body=b'test')
+        # simulate a failed deletion, which is only reported in the 'Errors' of the response
+        s3.delete_objects = lambda **kwargs: {
+            'Errors' : [{'Key' : 'object.csv', 'Code' : 'AccessDenied', 'Message' : 'Access Denied'}]
+        }
+        try:
+            result = self.aws_service.delete_all_objects()
+        finally:
+            # restore the client method, so that the bucket can be deleted on teardown
+            del s3.delete_objects
+        response = s3.list_objects_v2(Bucket=self.aws_service.name)
+
+        assert result is None
+        assert response['KeyCount'] == 1
+
+    def test_delete_all_objects_versioned(self):
+        """
+        Test deleting all object versions and delete markers of a versioned bucket.
+        """
+        s3 = get_client(self.session, 's3', self.region)
+        s3.put_bucket_versioning(Bucket=self.aws_service.name,
+                                 VersioningConfiguration={'Status' : 'Enabled'})
+        for body in [b'v1', b'v2']:
+            s3.put_object(Bucket=self.aws_service.name, Key='object.csv', Body=body)
+        s3.delete_object(Bucket=self.aws_service.name, Key='object.csv')
+
+        self.aws_service.delete_all_objects()
+        response = s3.list_object_versions(Bucket=self.aws_service.name)
+        assert not response.get('Versions')
+        assert not response.get('DeleteMarkers')
+
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['rds'], indirect=True) 
 class TestRDSInstance(BaseTestAWSService):
     """
     Tests RDS instance creation, deletion, retrieving of hostname.
     """
-    def create_mock_credentials_file(self):
+    def create_mock_credentials_file(self, tmp_path):
         """
         Create JSON file with mock DB credentials.
         """
-        filename = 'mock_credentials.json'
+        filename = str(tmp_path / 'mock_credentials.json')
         configs = {
             'DB_username' : DB_MOCK_USER,
             'DB_password' : DB_MOCK_PW,
@@ -217,7 +261,7 @@ class TestRDSInstance(BaseTestAWSService):
         """
         Creates RDS instance. Implements abstract method of parent class.
         """
-        self.credentials_file = self.create_mock_credentials_file()
+        self.credentials_file = self.create_mock_credentials_file(self.tmp_path)
 
         num_subnets = 2
         vpc = VPC(self.session, self.region, num_subnets, MOCK_NAME)
@@ -262,20 +306,19 @@ class TestRDSInstance(BaseTestAWSService):
             'db.t3.micro',
             collections=[vpc]
         )
-        # delete mock credentials file
-        os.remove(self.credentials_file)
-        self.credentials_file = None
         return rds_instance
     
     def service_exists(self):
         """
         Checks existence of RDS instance. Implements abstract method of parent class.
         """
-        rds = self.session.client('rds')
+        rds = get_client(self.session, 'rds', self.region)
         try:
             response = rds.describe_db_instances(DBInstanceIdentifier=self.name)
-        except:
-            return False
+        except ClientError as e:
+            if e.response['Error']['Code'] in NOT_FOUND_ERROR_CODES:
+                return False
+            raise
         instances = response['DBInstances']
         exists = (len(instances) == 1) and (instances[0]['DBInstanceIdentifier'] == self.name)
         return exists
@@ -289,7 +332,6 @@ class TestRDSInstance(BaseTestAWSService):
 
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['ec2'], indirect=True)
 class TestSubnet(BaseTestAWSService):
     """
     Tests wrapper class for Subnet.
@@ -298,7 +340,7 @@ class TestSubnet(BaseTestAWSService):
         vpc = VPC(self.session, self.region, 0, MOCK_NAME)
 
         # get AZ
-        ec2 = self.session.client('ec2', region_name=self.region)
+        ec2 = get_client(self.session, 'ec2', self.region)
         az_response = ec2.describe_availability_zones()
         az = az_response['AvailabilityZones'][0]
 
@@ -314,14 +356,13 @@ class TestSubnet(BaseTestAWSService):
         return subnet
 
     def service_exists(self):
-        ec2 = boto3.client('ec2', region_name=self.region)
+        ec2 = get_client(self.session, 'ec2', self.region)
         response = ec2.describe_subnets()
         ids = [subnet['SubnetId'] for subnet in response['Subnets']]
         return self.aws_service.id in ids
 
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['ec2'], indirect=True)
 class TestVPC(BaseTestAWSService):
     """
     Tests wrapper class for VPC.
@@ -331,20 +372,45 @@ class TestVPC(BaseTestAWSService):
         return vpc
 
     def service_exists(self):
-        ec2 = boto3.client('ec2', region_name=self.region)
+        ec2 = get_client(self.session, 'ec2', self.region)
         response = ec2.describe_vpcs()
         ids = [vpc['VpcId'] for vpc in response['Vpcs']]
         return self.aws_service.id in ids
 
+    def test_subnets_distributed_evenly(self):
+        """
+        Tests if the subnets are distributed evenly across the AZs used.
+        """
+        subnets = self.aws_service.of_type(Subnet)
+        counts = Counter(subnet.az['ZoneName'] for subnet in subnets)
+        assert len(counts) == self.aws_service.num_azs_used
+        assert max(counts.values()) - min(counts.values()) <= 1
+
+    def test_of_type(self):
+        """
+        Tests if the components of the VPC can be looked up by their class.
+        """
+        subnets = self.aws_service.of_type(Subnet)
+        assert len(subnets) == 4
+        assert subnets == [comp for comp in self.aws_service.components if isinstance(comp, Subnet)]
+        assert self.aws_service.of_type(S3Bucket) == []
+
+    def test_delete_returns_success_flag(self):
+        """
+        Tests if deleting the VPC and its components reports success.
+        """
+        assert self.aws_service.delete() == 1
+        assert self.aws_service.empty
+        assert not self.service_exists()
+
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['iam'], indirect=True)
 class TestIAMPolicy(BaseTestAWSService):
     """
     Tests wrapper class for IAMPolicy.
     """
     def create_service(self):
-        sts_client = self.session.client('sts')
+        sts_client = get_client(self.session, 'sts', self.region)
         account_id = sts_client.get_caller_identity()['Account']
 
         policy = IAMPolicy(
@@ -357,20 +423,19 @@ class TestIAMPolicy(BaseTestAWSService):
         return policy
 
     def service_exists(self):
-        iam = boto3.client('iam', region_name=self.region)
+        iam = get_client(self.session, 'iam', self.region)
         response = iam.list_policies(Scope='Local')
         arns = [policy['Arn'] for policy in response['Policies']]
         return self.aws_service.id in arns
 
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['iam'], indirect=True)
 class TestIAMRole(BaseTestAWSService):
     """
     Tests wrapper class for IAMRole.
     """
     def create_service(self):
-        sts_client = self.session.client('sts')
+        sts_client = get_client(self.session, 'sts', self.region)
         account_id = sts_client.get_caller_identity()['Account']
 
         # for deletion of all components, i.e. policy and role
@@ -392,14 +457,41 @@ class TestIAMRole(BaseTestAWSService):
         return role
 
     def service_exists(self):
-        iam = boto3.client('iam', region_name=self.region)
+        iam = get_client(self.session, 'iam', self.region)
         response = iam.list_roles()
         arns = [role['Arn'] for role in response['Roles']]
         return self.aws_service.id in arns
 
+    def test_role_in_collection_if_waiting_fails(self):
+        """
+        Tests that a role is part of its collection (and deleted with it) even if
+        waiting for the role to exist fails after it has been created.
+        """
+        # IAM is a global service, so the role uses the client without region
+        iam = get_client(self.session, 'iam')
+
+        class TimedOutWaiter:
+            def wait(self, **kwargs):
+                raise WaiterError('RoleExists', 'Max attempts exceeded', {})
+
+        # simulate the waiter timing out
+        iam.get_waiter = lambda name: TimedOutWaiter()
+        collection = AWSServiceCollection()
+        try:
+            role = IAMRole(self.session, 'test-role-timeout', 'glue.amazonaws.com', [],
+                           collections=[collection])
+        finally:
+            # restore the client method
+            del iam.get_waiter
+
+        assert not role.created
+        assert collection.of_type(IAMRole) == [role]
+        collection.delete_components_with_retry()
+        names = [role['RoleName'] for role in iam.list_roles()['Roles']]
+        assert 'test-role-timeout' not in names
+
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['ec2'], indirect=True)
 class TestSecurityGroup(BaseTestAWSService):
     """
     Tests wrapper class for SecurityGroup.
@@ -417,14 +509,13 @@ class TestSecurityGroup(BaseTestAWSService):
         return security_group
 
     def service_exists(self):
-        ec2 = boto3.client('ec2', region_name=self.region)
+        ec2 = get_client(self.session, 'ec2', self.region)
         response = ec2.describe_security_groups()
         ids = [sg['GroupId'] for sg in response['SecurityGroups']]
         return self.aws_service.id in ids
     
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['ec2'], indirect=True)
 class TestInternetGateway(BaseTestAWSService):
     """
     Tests wrapper class for InternetGateway.
@@ -440,14 +531,13 @@ class TestInternetGateway(BaseTestAWSService):
         return igw
 
     def service_exists(self):
-        ec2 = boto3.client('ec2', region_name=self.region)
+        ec2 = get_client(self.session, 'ec2', self.region)
         response = ec2.describe_internet_gateways()
         ids = [igw['InternetGatewayId'] for igw in response['InternetGateways']]
         return self.aws_service.id in ids
 
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['ec2'], indirect=True)
 class TestRoutingTable(BaseTestAWSService):
     """
     Tests wrapper class for RoutingTable.
@@ -479,7 +569,7 @@ class TestRoutingTable(BaseTestAWSService):
         # allow all internet traffic into public subnets
         self.aws_service.add_route(self.igw.id, '0.0.0.0/0')
         # check existing routes
-        ec2 = boto3.client('ec2', region_name=self.region)
+        ec2 = get_client(self.session, 'ec2', self.region)
         response = ec2.describe_route_tables()
         route_tables = response['RouteTables']
         # get route table created for this test
@@ -492,14 +582,13 @@ class TestRoutingTable(BaseTestAWSService):
         assert self.igw.id in gateway_ids
                 
     def service_exists(self):
-        ec2 = boto3.client('ec2', region_name=self.region)
+        ec2 = get_client(self.session, 'ec2', self.region)
         response = ec2.describe_route_tables()
         ids = [rt['RouteTableId'] for rt in response['RouteTables']]
         return self.aws_service.id in ids
 
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['glue'], indirect=True)
 class TestAWSGlueJob(BaseTestAWSService):
     """
     Tests wrapper class for AWSGlueJob.
@@ -531,23 +620,25 @@ class TestAWSGlueJob(BaseTestAWSService):
             self.region,
             self.name,
             role,
-            'test.py'
+            'test.py',
+            collections=[collection]
         )
         return glue_job
     
 
     def service_exists(self):
-        glue = boto3.client('glue', region_name=self.region)
+        glue = get_client(self.session, 'glue', self.region)
         try:
             response = glue.get_job(JobName=self.name)
-        except:
-            return False
+        except ClientError as e:
+            if e.response['Error']['Code'] in NOT_FOUND_ERROR_CODES:
+                return False
+            raise
         name = response['Job']['Name']
         return self.aws_service.name == name
 
 
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['lambda'], indirect=True)
 class TestS3LambdaFunction(BaseTestAWSService):
     """
     Tests wrapper class for S3LambdaFunction.
@@ -556,7 +647,7 @@ class TestS3LambdaFunction(BaseTestAWSService):
         """
         Create Lambda function along with respective IAM role and S3 bucket.
         """
-        sts_client = self.session.client('sts')
+        sts_client = get_client(self.session, 'sts', self.region)
         account_id = sts_client.get_caller_identity()['Account']
 
         # for deleting all services created
@@ -602,18 +693,19 @@ class TestS3LambdaFunction(BaseTestAWSService):
         """
         Checks if Lambda function exists.
         """
-        lambda_client = boto3.client('lambda', region_name=self.region)
+        lambda_client = get_client(self.session, 'lambda', self.region)
         try:
             response = lambda_client.get_function(FunctionName=self.name)
-        except:
-            return False
+        except ClientError as e:
+            if e.response['Error']['Code'] in NOT_FOUND_ERROR_CODES:
+                return False
+            raise
         name = response['Configuration']['FunctionName']
         return self.aws_service.name == name
     
     
 # lastly, test class for collecting and collectively deleting AWS services
 @pytest.mark.usefixtures("mock_session")
-@pytest.mark.parametrize("mock_session", ['s3'], indirect=True) 
 class TestAWSServiceCollection():
     """
     Tests the AWSServiceCollection class which can hold and simultaneously delete
@@ -656,7 +748,7 @@ class TestAWSServiceCollection():
         Remove all components from collection.
         """
         self.collection.delete_components()
-        s3 = self.session.client('s3')
+        s3 = get_client(self.session, 's3', self.region)
         response = s3.list_buckets()
         names = [bucket['Name'] for bucket in response['Buckets']]
         # list of buckets and list of components of the collection should now be empty
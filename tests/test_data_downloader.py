@@ -1,18 +1,67 @@
-import os
+import io
+import pytest
 import requests
+import responses
 
-# for importing the self-written Python modules, change working dir
-if os.path.basename(os.getcwd()) == 'tests':
-    os.chdir('..')
 from data_downloader import DataDownloader
 
 
+@responses.activate
 def test_data_downloader_url():
     """
-    Tests downloading the emission data from the EEA website.
+    Tests that the downloader requests the download link of the EEA website.
+    The response is mocked, so that no network access is needed.
     """
     downloader = DataDownloader()
+    responses.add(responses.HEAD, downloader.url, status=200)
     # request header of the url (without body) to check the download link
+    response = downloader.session.head(downloader.url)
+    assert response.status_code == 200
+    assert responses.calls[0].request.url == downloader.url
+
+
+@responses.activate
+def test_stream_emission_data():
+    """
+    Tests streaming the (mocked) dataset to a consumer.
+    """
+    downloader = DataDownloader()
+    responses.add(responses.GET, downloader.url, body=b'col1,col2\n1,2\n', status=200)
+    result = downloader.stream_emission_data(lambda data: data.read())
+    assert result == b'col1,col2\n1,2\n'
+
+
+@responses.activate
+def test_stream_emission_data_failed_request():
+    """
+    Tests that the consumer is not called if the request fails.
+    """
+    downloader = DataDownloader()
+    responses.add(responses.GET, downloader.url, status=404)
+    consumed = io.BytesIO()
+    result = downloader.stream_emission_data(lambda data: consumed.write(data.read()))
+    assert result is None
+    assert consumed.getvalue() == b''
+
+
+@responses.activate
+def test_stream_emission_data_failed_consumer(capsys):
+    """
+    Tests that no success is reported if the consumer fails (e.g. the upload to S3).
+    """
+    downloader = DataDownloader()
+    responses.add(responses.GET, downloader.url, body=b'col1,col2\n1,2\n', status=200)
+    result = downloader.stream_emission_data(lambda data: None)
+    assert result is None
+    assert 'Successfully downloaded' not in capsys.readouterr().out
+
+
+@pytest.mark.integration
+def test_data_downloader_url_available():
+    """
+    Tests the availability of the download link on the EEA website (requires network access).
+    """
+    downloader = DataDownloader()
     # this only checks the availability of the url and does not download the attached file
     response = requests.head(downloader.url)
     assert response.status_code == 200
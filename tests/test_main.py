@@ -0,0 +1,79 @@
+import threading
+import pytest
+
+from main import create_resources
+
+
+def test_create_resources_dependency_order():
+    """
+    Tests that each task is started only after its dependencies have been created
+    and that it receives their results as keyword arguments.
+    """
+    finished = []
+
+    def create(name):
+        def func(**kwargs):
+            # all dependencies must have finished before this task starts
+            assert all(dep in finished for dep in kwargs)
+            finished.append(name)
+            return name.upper()
+        return func
+
+    tasks = {
+        'vpc' : (create('vpc'), []),
+        'subnet' : (create('subnet'), ['vpc']),
+        'bucket' : (create('bucket'), []),
+        'database' : (create('database'), ['subnet', 'bucket']),
+    }
+    results = create_resources(tasks)
+
+    assert results == {'vpc' : 'VPC', 'subnet' : 'SUBNET', 'bucket' : 'BUCKET', 'database' : 'DATABASE'}
+    assert finished.index('vpc') < finished.index('subnet') < finished.index('database')
+    assert finished.index('bucket') < finished.index('database')
+
+
+def test_create_resources_failure():
+    """
+    Tests that the exception of a failing task is re-raised, dependent tasks are not
+    started, and running tasks are signalled to stop and finish before returning.
+    """
+    stop_event = threading.Event()
+    started = threading.Event()
+    stopped = []
+
+    def fail():
+        # fail only after the long-running task has started
+        started.wait(5)
+        raise ValueError('creation failed')
+
+    def wait_for_stop():
+        started.set()
+        # long-running task (e.g. waiting for the RDS instance) that stops when signalled
+        stopped.append(stop_event.wait(5))
+
+    def dependent(vpc):
+        raise AssertionError('dependent task must not be started')
+
+    tasks = {
+        'vpc' : (fail, []),
+        'data_warehouse' : (wait_for_stop, []),
+        'subnet' : (dependent, ['vpc']),
+    }
+    with pytest.raises(ValueError, match='creation failed'):
+        create_resources(tasks, stop_event=stop_event)
+
+    assert stop_event.is_set()
+    # the running task has finished (after being signalled) when the exception is raised
+    assert stopped == [True]
+
+
+def test_create_resources_unresolvable_dependency():
+    """
+    Tests that tasks with dependencies that can never be created raise an error.
+    """
+    tasks = {
+        'vpc' : (lambda: 'vpc', []),
+        'subnet' : (lambda vpc, gateway: 'subnet', ['vpc', 'gateway']),
+    }
+    with pytest.raises(Exception, match='Cannot resolve dependencies of subnet'):
+        create_resources(tasks)
@@ -1,10 +1,17 @@
 import os
-import pdb
+import zipfile
+import pytest
 
-# for importing the self-written Python modules, change working dir
-if os.path.basename(os.getcwd()) == 'tests':
-    os.chdir('..')
-from utils import find_optimal_number_of_AZs, handle_exceptions
+from utils import (find_optimal_number_of_AZs, handle_exceptions, create_deployment_package,
+                   deployment_package_up_to_date, dependencies_hash)
+
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts')
+# Lambda handler scripts and the deployment packages shipped with the repository
+DEPLOYMENT_PACKAGES = [
+    ('lambda_handler_etl.py', 'lambda_etl_depl_pkg.zip'),
+    ('lambda_handler_warehouse.py', 'lambda_warehouse_depl_pkg.zip'),
+]
 
 
 TEST_CASES_FIND_NUM_AZS = [
@@ -51,13 +58,13 @@ TEST_CASES_FIND_NUM_AZS = [
 ]
 
 
-def test_find_optimal_number_of_AZs():
+@pytest.mark.parametrize('case', TEST_CASES_FIND_NUM_AZS)
+def test_find_optimal_number_of_AZs(case):
     """
     Tests the function for determining the optimal number of AZs.
     """
-    for case in TEST_CASES_FIND_NUM_AZS:
-        result =  find_optimal_number_of_AZs(case['num_subnets'], case['num_AZs'])
-        assert result == case['expected_result_num_AZs']
+    result = find_optimal_number_of_AZs(case['num_subnets'], case['num_AZs'])
+    assert result == case['expected_result_num_AZs']
 
 
 def test_handle_exceptions():
@@ -68,4 +75,65 @@ def test_handle_exceptions():
     @handle_exceptions('mock_function', 'test Exception')
     def mock_function():
         raise Exception
-    mock_function()
+    assert mock_function() is None
+
+    # check if return value is passed through
+    @handle_exceptions('mock_function', 'test return value')
+    def mock_function_with_result():
+        return 1
+    assert mock_function_with_result() == 1
+
+
+def test_create_deployment_package_up_to_date(tmp_path):
+    """
+    Tests that an existing deployment package is not rebuilt if neither the script
+    nor the dependencies have changed.
+    """
+    script_path = str(tmp_path / 'mock_handler.py')
+    zip_path = str(tmp_path / 'mock_depl_pkg.zip')
+    with open(script_path, 'w') as file:
+        file.write('def handler(event, context):\n    pass\n')
+    # existing package (built with the dependencies 'sqlalchemy' and 'psycopg2-binary')
+    with zipfile.ZipFile(zip_path, 'w') as zip_file:
+        zip_file.writestr('marker.txt', 'existing package')
+        zip_file.comment = dependencies_hash(['sqlalchemy', 'psycopg2-binary']).encode()
+    # make the package newer than the script
+    script_mtime = os.path.getmtime(script_path)
+    os.utime(zip_path, (script_mtime + 10, script_mtime + 10))
+
+    # the order of the dependencies does not matter
+    create_deployment_package(script_path, zip_path, dependencies=['psycopg2-binary', 'sqlalchemy'])
+    with zipfile.ZipFile(zip_path) as zip_file:
+        names = zip_file.namelist()
+
+    assert names == ['marker.txt']
+    # a changed list of dependencies requires rebuilding the package
+    assert not deployment_package_up_to_date(script_path, zip_path, ['sqlalchemy'])
+
+
+def test_create_deployment_package_failed_install(tmp_path):
+    """
+    Tests that no deployment package is written if the dependencies cannot be installed.
+    """
+    script_path = str(tmp_path / 'mock_handler.py')
+    zip_path = str(tmp_path / 'mock_depl_pkg.zip')
+    with open(script_path, 'w') as file:
+        file.write('def handler(event, context):\n    pass\n')
+
+    with pytest.raises(Exception):
+        create_deployment_package(script_path, zip_path, dependencies=['sqlalchemy'],
+                                  python_version='python-does-not-exist')
+    assert not os.path.exists(zip_path)
+
+
+@pytest.mark.parametrize('script, zip_file', DEPLOYMENT_PACKAGES)
+def test_deployment_package_contains_current_handler(script, zip_file):
+    """
+    Tests that the shipped deployment packages contain the current version of the
+    Lambda handler, i.e. that the packages were rebuilt after changing the handler.
+    """
+    with open(os.path.join(SCRIPTS_DIR, script), 'rb') as file:
+        source = file.read()
+    with zipfile.ZipFile(os.path.join(SCRIPTS_DIR, zip_file)) as package:
+        packaged = package.read(script)
+    assert packaged == source
@@ -1,9 +1,19 @@
+import functools
+import hashlib
+import logging
 import os
 import pickle
+import pickletools
 import shutil
 import subprocess
+import tempfile
+import zipfile
 
 
+logger = logging.getLogger(__name__)
+
+
+@functools.lru_cache(maxsize=256)
 def find_optimal_number_of_AZs(num_subnets, num_azs):
     """
     Given an even number of subnets to be distributed across multiple AZs,
@@ -12,19 +22,19 @@ def find_optimal_number_of_AZs(num_subnets, num_azs):
     1. Use as many AZs as possible, while using at least two subnets per AZ.
     2. If creating less than 4 subnets, use 2 AZs.
     """
-    if num_subnets >= 4:
-        return min(num_azs, num_subnets // 2)
-    elif num_subnets == 1:
-        return 1
-    else:
-        return 2
+    if num_subnets < 4:
+        return 1 if num_subnets == 1 else 2
+    return min(num_azs, num_subnets >> 1)
 
 def save_object(obj, path):
     """
     Saves any Python object to a local file using pickle.
+    Uses the highest pickle protocol and removes unused memo operations
+    for a smaller file that loads faster.
     """
+    data = pickletools.optimize(pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL))
     with open(path, 'wb') as file:
-        pickle.dump(obj, file)
+        file.write(data)
 
 def load_object(path):
     """
@@ -38,72 +48,109 @@ def handle_exceptions(service_type, operation):
     """
     Decorator for handling exceptions while performing 
     different operations on services/functions.
+    Returns the result of the function, or None if an exception occured.
     """
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
             try:
-                func(*args, **kwargs)
+                return func(*args, **kwargs)
             except Exception as e:
-                print(f"An error occured when trying to {operation} {service_type}:\n{e}")
+                logger.error("An error occured when trying to %s %s:\n%s", operation, service_type, e)
+                return None
         return wrapper
     return decorator
 
+def dependencies_hash(dependencies):
+    """
+    Returns a hash identifying a list of dependencies (independent of their order).
+    """
+    return hashlib.sha256('\n'.join(sorted(dependencies or [])).encode()).hexdigest()
+
+def deployment_package_up_to_date(script_path, zip_path, dependencies=None):
+    """
+    Checks if a deployment package exists that is newer than the script it contains
+    and was built with the same dependencies (stored as a hash in the zip file comment).
+    """
+    if not (os.path.exists(zip_path)
+            and os.path.getmtime(zip_path) >= os.path.getmtime(script_path)):
+        return False
+    try:
+        with zipfile.ZipFile(zip_path) as zip_file:
+            return zip_file.comment.decode() == dependencies_hash(dependencies)
+    except zipfile.BadZipFile:
+        return False
+
 def create_deployment_package(script_path, zip_path, dependencies=None,
-                              python_version='python3.8', upgrade_pip=True):
+                              python_version='python3.8', upgrade_pip=False, force=False,
+                              wheel_cache_dir=None, platform=None):
     """
     Creates a deployment package consisting of a Python script and its dependencies.
+    The package is only rebuilt if the script or the dependencies have changed since it was created.
+    Raises an exception (without writing the package) if the dependencies cannot be installed.
     
     Args:
         script_path (str): The path to the python script with the lambda function handler.
         zip_path (str): The path to the zip file that will be created.
         dependencies (list): A list of Python libraries to include in the package.
+        upgrade_pip (bool): Upgrade pip before installing the dependencies (requires a network round-trip).
+        force (bool): Rebuild the package even if it is up to date (e.g. to update the dependencies to newer versions).
+        wheel_cache_dir (str): Directory with prebuilt wheels of the dependencies
+            (e.g. from 'pip download -d <dir> ...'); if given, installs from there without network access.
+        platform (str): Target platform of the Lambda runtime (e.g. 'manylinux2014_x86_64');
+            if given, installs binary wheels for this platform and the Python version of the runtime,
+            so that packages built on another OS work on Lambda.
     """
-    # create a temporary directory
-    temp_dir = 'temp_package_dir'
-    os.makedirs(temp_dir, exist_ok=True) 
-    
-    # copy the Python script to the temporary directory
-    shutil.copy(script_path, temp_dir)
+    if not force and deployment_package_up_to_date(script_path, zip_path, dependencies):
+        logger.info("Deployment package %s is up to date", zip_path)
+        return
 
-    # move to the temporary directory
-    os.chdir(temp_dir)
+    # create a temporary directory (unique per call, so that several packages
+    # can be built concurrently)
+    with tempfile.TemporaryDirectory(prefix='temp_package_dir_') as temp_dir:
 
-    # install dependencies
-    if dependencies:
-        # suppress the output of any subprocess
-        with open(os.devnull, 'w') as devnull:
+        # copy the Python script to the temporary directory
+        shutil.copy(script_path, temp_dir)
 
-            # can try to upgrade pip to avoid any problems
-            if upgrade_pip:
-                print("Upgrading pip")
-                try:
-                    subprocess.check_call([python_version, '-m', 'pip', 'install', '--upgrade', 'pip'],
-                                        stdout=devnull, stderr=devnull)
-                except Exception as e:
-                    print(f"Could not update pip: {e}")
+        # install dependencies
+        if dependencies:
+            # suppress the output of any subprocess
+            with open(os.devnull, 'w') as devnull:
+
+                # can try to upgrade pip to avoid any problems
+                if upgrade_pip:
+                    logger.info("Upgrading pip")
+                    try:
+                        subprocess.check_call([python_version, '-m', 'pip', 'install', '--upgrade', 'pip'],
+                                              stdout=devnull, stderr=devnull)
+                    except Exception as e:
+                        logger.error("Could not update pip: %s", e)
 
-            # install the Python packages locally and in the temporary directory
-            for package in dependencies:
-                # start subprocess to install the package
-                print(f"Installing dependencies for Lambda function deployment package ({python_version}): {package}")
+                # install all Python packages in the temporary directory with a single
+                # pip call, so that pip only starts and resolves the dependencies once
+                logger.info("Installing dependencies for Lambda function deployment package (%s): %s",
+                            python_version, ', '.join(dependencies))
+                pip_options = ['--no-input', '--disable-pip-version-check', '--no-python-version-warning']
+                if wheel_cache_dir:
+                    pip_options += ['--no-index', '--find-links', os.path.abspath(wheel_cache_dir)]
+                if platform:
+                    pip_options += ['--platform', platform, '--only-binary=:all:',
+                                    '--python-version', python_version.replace('python', '')]
                 try:
-                    subprocess.check_call([python_version, '-m', 'pip', 'install', package, '--upgrade', '--target', '.'],
-                                        stdout=devnull, stderr=devnull)
+                    subprocess.check_call([python_version, '-m', 'pip', 'install', '--upgrade', '--target', '.',
+                                           *pip_options, *dependencies],
+                                          stdout=devnull, stderr=devnull, cwd=temp_dir)
                 except Exception as e:
-                    print(f"Could not install {package}: {e}")
-
-    # create a zip file (i.e., the deployment package)
-    if os.path.exists(zip_path):
-        os.remove(zip_path)      
-    shutil.make_archive(zip_path.replace('.zip', ''), 'zip', '.')
-
-    # move back to the parent directory
-    os.chdir('..')
-
-    # move the zip file to the parent directory
-    if os.path.exists(zip_path):
-            os.remove(zip_path)  
-    shutil.move(f"{temp_dir}/{zip_path}", '.')
+                    # do not create a package without its dependencies
+                    logger.error("Could not install %s: %s", ', '.join(dependencies), e)
+                    raise
 
-    # remove the temporary directory
-    shutil.rmtree(temp_dir)
+        # create the zip file (i.e., the deployment package) in a single pass
+        # over the temporary directory, writing directly to its destination
+        with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED, compresslevel=6) as zip_file:
+            # identify the dependencies the package was built with
+            zip_file.comment = dependencies_hash(dependencies).encode()
+            for root, _, files in os.walk(temp_dir):
+                for filename in files:
+                    abs_path = os.path.join(root, filename)
+                    zip_file.write(abs_path, arcname=os.path.relpath(abs_path, temp_dir))